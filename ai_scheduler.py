@@ -1,8 +1,16 @@
 from datetime import date
-from models import db, Worker, Shift
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+from models import db, Worker, Shift, Business, business_scope
+from metrics import metrics
 import json
+import os
+import re
+import tempfile
+import threading
+import time
 from pulp import (
-    LpProblem, LpVariable, LpBinary, lpSum, LpMinimize, PULP_CBC_CMD
+    LpProblem, LpVariable, LpBinary, lpSum, LpMinimize, LpStatus, PULP_CBC_CMD
 )
 
 
@@ -15,81 +23,247 @@ def get_month_range(year: int, month: int):
     return first_day, last_day
 
 
-def build_monthly_optimizer(year: int, month: int):
-    """
-    Assigns workers to all shifts already created by the manager for a given month.
-    Shifts must already exist in DB (with worker_id = NULL).
-    """
-    workers = Worker.query.all()
+# CBC log lines carrying the incumbent objective and best bound
+_CBC_INCUMBENT = re.compile(r"Cbc00(?:04|12)I Integer solution of (\S+)")
+_CBC_PROGRESS = re.compile(r"Cbc0010I After (\d+) nodes, \d+ on tree, (\S+) best solution, best possible (\S+)")
+_CBC_RELAXATION = re.compile(r"Continuous objective value is (\S+)")
 
-    # Get manager-created, unassigned shifts
-    shifts = Shift.query.filter(
-        db.extract('year', Shift.date) == year,
-        db.extract('month', Shift.date) == month,
-        Shift.worker_id.is_(None)
-    ).all()
 
-    if not shifts:
-        print("⚠️ No unassigned shifts found for this month.")
-        return
+def _parse_cbc_log(text):
+    """Latest incumbent objective, best bound and node count found in a CBC log."""
+    state = {"incumbent": None, "bound": None, "nodes": 0}
+    for line in text.splitlines():
+        match = _CBC_PROGRESS.search(line)
+        if match:
+            state["nodes"] = int(match.group(1))
+            incumbent = float(match.group(2))
+            # CBC prints 1e+50 while it has no solution yet
+            if abs(incumbent) < 1e49:
+                state["incumbent"] = incumbent
+            state["bound"] = float(match.group(3))
+            continue
+        match = _CBC_INCUMBENT.search(line)
+        if match:
+            state["incumbent"] = float(match.group(1))
+            continue
+        # The LP relaxation is the first bound, before any branching
+        match = _CBC_RELAXATION.search(line)
+        if match and state["bound"] is None:
+            state["bound"] = float(match.group(1))
 
-    # Parse unavailable days JSON for each worker
-    worker_unavail = {}
-    for w in workers:
+    if state["incumbent"] is not None and state["bound"] is not None:
+        state["gap"] = abs(state["incumbent"] - state["bound"]) / max(abs(state["incumbent"]), 1e-9)
+    else:
+        state["gap"] = None
+    return state
+
+
+def _solve_with_progress(prob, progress, interval=0.5, time_limit=None):
+    """Solve with CBC logging to a file, reporting incumbent/gap every interval seconds."""
+    with tempfile.TemporaryDirectory() as tmp:
+        log_path = os.path.join(tmp, "cbc.log")
+        done = threading.Event()
+        start = time.perf_counter()
+
+        def watch():
+            while not done.wait(interval):
+                try:
+                    with open(log_path) as f:
+                        state = _parse_cbc_log(f.read())
+                except FileNotFoundError:
+                    continue
+                progress("solve", dict(state, elapsed=round(time.perf_counter() - start, 2)))
+
+        watcher = threading.Thread(target=watch, daemon=True)
+        watcher.start()
         try:
-            worker_unavail[w.id] = set(json.loads(w.unavailable_days or "[]"))
+            prob.solve(PULP_CBC_CMD(msg=0, logPath=log_path, timeLimit=time_limit))
+        finally:
+            done.set()
+            watcher.join()
+
+
+def load_month_problem(year: int, month: int, unassigned_only: bool = True):
+    """
+    Plain (picklable) description of the month's workers and shifts for the
+    business in scope, so it can be modified and solved away from the database.
+    """
+    first_day, last_day = get_month_range(year, month)
+
+    workers = []
+    rows = db.session.query(
+        Worker.id, Worker.name, Worker.is_cart_staff, Worker.is_turn_grill_staff, Worker.unavailable_days
+    ).order_by(Worker.id)
+    for w in rows:
+        try:
+            unavailable = set(json.loads(w.unavailable_days or "[]"))
         except json.JSONDecodeError:
-            worker_unavail[w.id] = set()
+            unavailable = set()
+        workers.append({
+            "id": w.id,
+            "name": w.name,
+            "is_cart_staff": bool(w.is_cart_staff),
+            "is_turn_grill_staff": bool(w.is_turn_grill_staff),
+            "unavailable": unavailable,
+        })
+
+    query = db.session.query(
+        Shift.id, Shift.date, Shift.start_time, Shift.end_time, Shift.role_type
+    ).filter(Shift.date.between(first_day, last_day))
+    if unassigned_only:
+        # Get manager-created, unassigned shifts
+        query = query.filter(Shift.worker_id.is_(None))
+    shifts = [dict(row._mapping) for row in query.order_by(Shift.date, Shift.start_time, Shift.id)]
+
+    return {"workers": workers, "shifts": shifts, "max_shifts_per_day": 1}
+
+
+def _name_id(value):
+    # Hypothetical scenario workers have negative ids; keep names unique once PuLP strips "-"
+    return f"n{-value}" if value < 0 else str(value)
+
+
+def build_model(problem, allow_uncovered: bool = False):
+    """
+    Build the assignment model for a problem from load_month_problem.
+    With allow_uncovered, shifts may go unfilled and the solver maximizes
+    coverage instead of requiring every shift to be filled.
+    Returns (prob, x) where x[(worker_id, shift_id)] is the decision variable.
+    """
+    workers = problem["workers"]
+    shifts = problem["shifts"]
 
     prob = LpProblem("Monthly_Shift_Scheduling", LpMinimize)
 
-    # Binary decision variables: x[(worker_id, shift.id)] = 1 if assigned
+    # Binary decision variables: x[(worker_id, shift_id)] = 1 if assigned
     x = {}
     for s in shifts:
-        shift_date_str = s.date.strftime("%Y-%m-%d")
+        shift_date_str = s["date"].strftime("%Y-%m-%d")
         for w in workers:
             # Skip if worker unavailable that day
-            if shift_date_str in worker_unavail[w.id]:
+            if shift_date_str in w["unavailable"]:
                 continue
 
             # Role eligibility filtering
-            if s.role_type == "cart" and not getattr(w, "is_cart_staff", False):
+            if s["role_type"] == "cart" and not w["is_cart_staff"]:
                 continue
-            if s.role_type == "turn_grill" and not getattr(w, "is_turn_grill_staff", False):
+            if s["role_type"] == "turn_grill" and not w["is_turn_grill_staff"]:
                 continue
 
             # If eligible, create decision var
-            x[(w.id, s.id)] = LpVariable(f"x_{w.id}_{s.id}", cat=LpBinary)
+            x[(w["id"], s["id"])] = LpVariable(f"x_{_name_id(w['id'])}_{s['id']}", cat=LpBinary)
 
-    # OBJECTIVE: maximize number of assigned shifts
-    prob += lpSum(x.values())
+    if allow_uncovered:
+        # OBJECTIVE: fill as many shifts as possible
+        prob += -lpSum(x.values())
+    else:
+        # OBJECTIVE: maximize number of assigned shifts
+        prob += lpSum(x.values())
 
-    # CONSTRAINT: Each shift exactly once
+    # CONSTRAINT: Each shift exactly once (at most once when uncovered shifts are allowed)
     for s in shifts:
-        prob += lpSum(
-            x[(w.id, s.id)] for w in workers if (w.id, s.id) in x
-        ) == 1, f"Shift_{s.id}_coverage"
+        covering = lpSum(x[(w["id"], s["id"])] for w in workers if (w["id"], s["id"]) in x)
+        if allow_uncovered:
+            prob += covering <= 1, f"Shift_{s['id']}_coverage"
+        else:
+            prob += covering == 1, f"Shift_{s['id']}_coverage"
 
-    # CONSTRAINT: Max 1 shift per worker per day
+    # CONSTRAINT: Max shifts per worker per day (1 unless a scenario relaxes it)
+    shifts_by_date = {}
+    for s in shifts:
+        shifts_by_date.setdefault(s["date"], []).append(s)
     for w in workers:
-        dates_in_month = {s.date for s in shifts}
-        for d in dates_in_month:
+        for d, day_shifts in shifts_by_date.items():
             relevant_vars = [
-                x[(w.id, s.id)]
-                for s in shifts
-                if s.date == d and (w.id, s.id) in x
+                x[(w["id"], s["id"])]
+                for s in day_shifts
+                if (w["id"], s["id"]) in x
             ]
-            if relevant_vars:
-                prob += lpSum(relevant_vars) <= 1, f"OneShiftPerDay_w{w.id}_{d}"
+            if len(relevant_vars) > problem["max_shifts_per_day"]:
+                prob += lpSum(relevant_vars) <= problem["max_shifts_per_day"], \
+                    f"OneShiftPerDay_w{_name_id(w['id'])}_{d}"
+
+    return prob, x
+
+
+def solve_model(prob, progress=None, time_limit=None):
+    if progress:
+        _solve_with_progress(prob, progress, time_limit=time_limit)
+    else:
+        prob.solve(PULP_CBC_CMD(msg=0, timeLimit=time_limit))
+
+
+def extract_assignments(x):
+    """{shift_id: worker_id} for every variable the solver set to 1."""
+    return {s_id: w_id for (w_id, s_id), var in x.items() if var.varValue == 1}
+
+
+def build_monthly_optimizer(year: int, month: int, progress=None):
+    """
+    Assigns workers to all shifts already created by the manager for a given month.
+    Shifts must already exist in DB (with worker_id = NULL).
+    Only sees the business currently in scope (see models.business_scope).
+    progress, if given, is called as progress(stage, data) with the model size
+    and, during the solve, the incumbent objective and gap.
+    Returns a summary of the model size and solver outcome.
+    """
+    with metrics.phase("fetch"):
+        problem = load_month_problem(year, month)
+    shifts, workers = problem["shifts"], problem["workers"]
+
+    if not shifts:
+        print("⚠️ No unassigned shifts found for this month.")
+        return {"shifts": 0, "workers": len(workers), "variables": 0,
+                "constraints": 0, "assigned": 0, "status": "Empty"}
+
+    with metrics.phase("build"):
+        prob, x = build_model(problem)
+
+    if progress:
+        progress("model", {
+            "shifts": len(shifts),
+            "workers": len(workers),
+            "variables": len(x),
+            "constraints": len(prob.constraints),
+        })
 
     # Solve
-    prob.solve(PULP_CBC_CMD(msg=0))
+    with metrics.phase("solve"):
+        solve_model(prob, progress)
 
     # Save results to DB
-    for (w_id, s_id), var in x.items():
-        if var.varValue == 1:
+    with metrics.phase("write_back"):
+        assignments = extract_assignments(x)
+        for s_id, w_id in assignments.items():
             shift = Shift.query.get(s_id)
             shift.worker_id = w_id
 
-    db.session.commit()
-    print("✅ Monthly schedule updated with worker assignments.")
\ No newline at end of file
+        db.session.commit()
+    print("✅ Monthly schedule updated with worker assignments.")
+
+    return {
+        "shifts": len(shifts),
+        "workers": len(workers),
+        "variables": len(x),
+        "constraints": len(prob.constraints),
+        "assigned": len(assignments),
+        "status": LpStatus[prob.status],
+    }
+
+
+def build_all_business_optimizers(year: int, month: int, max_workers: int = 4):
+    """
+    Run build_monthly_optimizer once per business, several at a time.
+    Each run gets its own app context (and so its own session) and only
+    sees its own business's workers and shifts.
+    Returns {business_id: summary}.
+    """
+    app = current_app._get_current_object()
+    business_ids = [b.id for b in Business.query.order_by(Business.id).all()]
+
+    def run(business_id):
+        with app.app_context(), business_scope(business_id):
+            return build_monthly_optimizer(year, month)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        return dict(zip(business_ids, pool.map(run, business_ids)))
@@ -1,23 +1,35 @@
-from flask import Flask, render_template, request, redirect, url_for, Blueprint, jsonify
-from models import db, Worker, Shift, User, ShiftTemplate, generate_random_password
+from flask import Flask, render_template, request, redirect, url_for, Blueprint, jsonify, g, Response, abort
+from models import db, Worker, Shift, User, ShiftTemplate, Business, ScheduleSnapshot, Notification, generate_random_password
+from models import set_current_business_id, reset_current_business_id, business_scope
 import calendar
 from helpers import get_month_range
 from datetime import datetime, date, timedelta
-from sqlalchemy import extract, event
+from sqlalchemy import event
+from sqlalchemy.orm import joinedload
 from sqlalchemy.engine import Engine
 import sqlite3
-from ai_scheduler import build_monthly_optimizer
+from ai_scheduler import build_all_business_optimizers
+from metrics import metrics
+import solver_jobs
+import eligibility
+from eligibility import ShiftClaimError
+from notifications import mail_queue, publish_schedule
+from scenarios import run_scenarios, ScenarioError, ScenarioPoolError, MAX_SCENARIOS, SCENARIO_TIME_LIMIT
+from schedule_history import unassign_shifts, restore_snapshot, current_assignments, diff_assignments, describe_diff
 from flask_login import login_user, logout_user, login_required, current_user
 import json
+import math
 from collections import defaultdict
 import random, string
+import os
+import click
 
 
 
 app = Flask(__name__)
 app.secret_key = 'yo-gabba-gabba'
 from flask import flash
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///schedule.db'
+app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///schedule.db')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 db.init_app(app)
 
@@ -26,6 +38,12 @@ from models import db  # or however you import db
 
 migrate = Migrate(app, db)
 
+# Per-route latency, SQL, template and optimizer timings exposed at /metrics
+metrics.init_app(app)
+
+# Background email delivery for schedule notifications (MAIL_* settings)
+mail_queue.init_app(app)
+
 # Enable foreign key constraints in SQLite
 @event.listens_for(Engine, "connect")
 def set_sqlite_pragma(dbapi_connection, connection_record):
@@ -34,6 +52,19 @@ def set_sqlite_pragma(dbapi_connection, connection_record):
         cursor.execute("PRAGMA foreign_keys=ON;")
         cursor.close()
 
+# Count and time every SQL statement for the metrics registry
+@event.listens_for(Engine, "before_cursor_execute")
+def record_query_start(conn, cursor, statement, parameters, context, executemany):
+    metrics.before_cursor_execute(conn)
+
+@event.listens_for(Engine, "after_cursor_execute")
+def record_query_end(conn, cursor, statement, parameters, context, executemany):
+    metrics.after_cursor_execute(conn)
+
+@event.listens_for(Engine, "handle_error")
+def record_query_error(exception_context):
+    metrics.handle_error(exception_context.connection)
+
 # Define User class and methods
 
 
@@ -46,12 +77,26 @@ login_manager.login_view = 'login'
 
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    return User.query.execution_options(all_businesses=True).get(int(user_id))
+
+# Scope every query in the request to the logged-in user's business
+@app.before_request
+def scope_to_business():
+    if current_user.is_authenticated:
+        g.business_token = set_current_business_id(current_user.business_id)
+
+@app.teardown_request
+def unscope_business(exc):
+    token = g.pop('business_token', None)
+    if token is not None:
+        reset_current_business_id(token)
 
 @app.route('/', methods=['GET', 'POST'])
 def login():
     if request.method == 'POST':
-        user = User.query.filter_by(username=request.form['username']).first()
+        user = User.query.execution_options(all_businesses=True).filter_by(
+            username=request.form['username']
+        ).first()
         if user and user.check_password(request.form['password']):
             login_user(user)
             flash('Logged in successfully.')
@@ -99,10 +144,9 @@ def dashboard_employee():
         next_month = month + 1
         next_year = year
 
-    # Query all shifts for the month
-    shifts = Shift.query.filter(
-        extract('year', Shift.date) == year,
-        extract('month', Shift.date) == month
+    # Query all shifts for the month (with workers, the calendar shows their names)
+    shifts = Shift.query.options(joinedload(Shift.worker)).filter(
+        Shift.date.between(first_day, last_day)
     ).all()
 
     # Group shifts by date
@@ -110,9 +154,15 @@ def dashboard_employee():
     for s in shifts:
         shifts_by_day[s.date].append(s)  # s.date should be a date object
 
+    unread = Notification.query.filter(
+        Notification.worker_id == (current_worker.id if current_worker else None),
+        Notification.read_at.is_(None)
+    ).count()
+
     return render_template(
         'employee_calendar.html',
         current_worker=current_worker,
+        unread=unread,
         days=days,
         first_weekday=first_weekday,
         shifts_by_day=shifts_by_day,
@@ -154,10 +204,9 @@ def dashboard_manager():
         next_month = month + 1
         next_year = year
 
-    # Query all shifts for the month
-    shifts = Shift.query.filter(
-        extract('year', Shift.date) == year,
-        extract('month', Shift.date) == month
+    # Query all shifts for the month (with workers, the calendar shows their names)
+    shifts = Shift.query.options(joinedload(Shift.worker)).filter(
+        Shift.date.between(first_day, last_day)
     ).all()
 
     # Group shifts by date
@@ -165,9 +214,12 @@ def dashboard_manager():
     for s in shifts:
         shifts_by_day[s.date].append(s)  # s.date should be a date object
 
+    workers = Worker.query.order_by(Worker.name).all()
+
     return render_template(
         'manager_calendar.html',
         current_worker=current_worker,
+        workers=workers,
         days=days,
         first_weekday=first_weekday,
         shifts_by_day=shifts_by_day,
@@ -180,6 +232,7 @@ def dashboard_manager():
     )
 
 @app.route('/add_shift', methods=['GET', 'POST'])
+@login_required
 def add_shift():
     workers = Worker.query.all()
 
@@ -188,7 +241,8 @@ def add_shift():
         date_str = request.form['date']
         start_time_str = request.form['start_time']
         end_time_str = request.form['end_time']
-        worker_id = request.form['worker_id']
+        # Scoped lookup, so a worker from another business 404s
+        worker = Worker.query.get_or_404(request.form.get('worker_id', type=int))
 
         # Convert strings to proper types
         date = datetime.strptime(date_str, "%Y-%m-%d").date()
@@ -198,7 +252,7 @@ def add_shift():
         new_shift = Shift(date=date,
                           start_time=start_time,
                           end_time=end_time,
-                          worker_id=worker_id)
+                          worker_id=worker.id)
 
         db.session.add(new_shift)
         db.session.commit()
@@ -207,6 +261,7 @@ def add_shift():
     return render_template('add_shift.html', workers=workers)
 
 @app.route("/workers", methods=["GET", "POST"])
+@login_required
 def manage_workers():
     if request.method == "POST":
         name = request.form.get("name")
@@ -231,16 +286,19 @@ def generate_unique_username(base_name):
     username = base_name.lower().replace(" ", "")
     candidate = username
     counter = 1
-    while User.query.filter_by(username=candidate).first():
+    # Usernames are unique across every business
+    while User.query.execution_options(all_businesses=True).filter_by(username=candidate).first():
         candidate = f"{username}{counter}"
         counter += 1
     return candidate
 
 @app.route("/add_worker", methods=["POST"])
+@login_required
 def add_worker():
     name = request.form["name"]
     is_cart_staff = "is_cart_staff" in request.form
     is_turn_grill_staff = "is_turn_grill_staff" in request.form
+    email = request.form.get("email") or None
 
     # 1️⃣ Create the user
     username = generate_unique_username(name)
@@ -251,6 +309,7 @@ def add_worker():
     # 2️⃣ Create the worker and link to user
     new_worker = Worker(
         name=name,
+        email=email,
         is_cart_staff=is_cart_staff,
         is_turn_grill_staff=is_turn_grill_staff,
         user=new_user
@@ -270,6 +329,7 @@ def view_passwords():
     return render_template('view_passwords.html', users=users)
 
 @app.route('/delete_worker/<int:worker_id>', methods=['POST'])
+@login_required
 def delete_worker(worker_id):
     worker = Worker.query.get_or_404(worker_id)
     db.session.delete(worker)
@@ -277,18 +337,19 @@ def delete_worker(worker_id):
     return redirect(url_for('manage_workers'))
 
 @app.route('/add_shift/<date>', methods=['GET', 'POST'])
+@login_required
 def add_shift_with_date(date):
     workers = Worker.query.all()
     if request.method == 'POST':
         start_time = request.form['start_time']
         end_time = request.form['end_time']
-        worker_id = request.form['worker_id']
+        worker = Worker.query.get_or_404(request.form.get('worker_id', type=int))
 
         new_shift = Shift(
             date=datetime.strptime(date, '%Y-%m-%d').date(),
             start_time=datetime.strptime(start_time, '%H:%M').time(),
             end_time=datetime.strptime(end_time, '%H:%M').time(),
-            worker_id=worker_id
+            worker_id=worker.id
         )
         db.session.add(new_shift)
         db.session.commit()
@@ -301,19 +362,81 @@ def add_shift_with_date(date):
 def clear_month_schedule(year, month):
     year = int(year)
     month = int(month)
-    shifts = Shift.query.filter(
-        extract("year", Shift.date) == year,
-        extract("month", Shift.date) == month
-    ).all()
+    month_first, month_last = get_month_range(year, month)
+    first_day, last_day = month_first, month_last
 
-    for shift in shifts:
-        shift.worker_id = None  # unassign worker
-    
-    db.session.commit()
-    flash("All shifts have been unassigned for this month.", "info")
-    return redirect(url_for("dashboard_manager"))
+    # Optional narrowing: a date range inside the month, a role, or one worker
+    try:
+        if request.form.get("start_date"):
+            first_day = datetime.strptime(request.form["start_date"], "%Y-%m-%d").date()
+        if request.form.get("end_date"):
+            last_day = datetime.strptime(request.form["end_date"], "%Y-%m-%d").date()
+    except ValueError:
+        flash("Dates must look like YYYY-MM-DD. Nothing was unassigned.", "danger")
+        return redirect(url_for("dashboard_manager", year=year, month=month))
+
+    # Never reach outside the month in the URL
+    first_day, last_day = max(first_day, month_first), min(last_day, month_last)
+    if first_day > last_day:
+        flash("The start date must be on or before the end date, within this month. Nothing was unassigned.",
+              "danger")
+        return redirect(url_for("dashboard_manager", year=year, month=month))
+
+    role_type = request.form.get("role_type") or None
+    worker_id = request.form.get("worker_id", type=int)
+
+    snapshot, count = unassign_shifts(first_day, last_day, role_type=role_type, worker_id=worker_id)
+    flash(f"{count} shifts unassigned. Saved as snapshot #{snapshot.id}.", "info")
+    return redirect(url_for("dashboard_manager", year=year, month=month))
+
+@app.route('/schedule_history/<int:year>/<int:month>')
+@login_required
+def schedule_history(year, month):
+    first_day, last_day = get_month_range(year, month)
+    snapshots = ScheduleSnapshot.query.filter(
+        ScheduleSnapshot.first_day <= last_day,
+        ScheduleSnapshot.last_day >= first_day
+    ).order_by(ScheduleSnapshot.id.desc()).all()
+
+    # Compare two snapshots, or a snapshot against the live schedule ("current")
+    before_id = request.args.get("before")
+    after_id = request.args.get("after", "current")
+    if (before_id and not before_id.isdigit()) or (after_id != "current" and not after_id.isdigit()):
+        abort(400)
+    changes = None
+    if before_id:
+        before = ScheduleSnapshot.query.get_or_404(int(before_id))
+        if after_id == "current":
+            after = current_assignments(before.first_day, before.last_day)
+            # Only compare shifts the snapshot covered
+            after = {shift_id: after.get(shift_id) for shift_id in before.get_assignments()}
+        else:
+            after = ScheduleSnapshot.query.get_or_404(int(after_id)).get_assignments()
+        changes = describe_diff(diff_assignments(before.get_assignments(), after))
+
+    return render_template(
+        "schedule_history.html",
+        year=year,
+        month=month,
+        snapshots=snapshots,
+        before_id=before_id,
+        after_id=after_id,
+        changes=changes
+    )
+
+@app.route('/schedule_history/restore/<int:snapshot_id>', methods=['POST'])
+@login_required
+def restore_schedule_snapshot(snapshot_id):
+    snapshot = ScheduleSnapshot.query.get_or_404(snapshot_id)
+    undo, changed, skipped = restore_snapshot(snapshot)
+    message = f"Restored snapshot #{snapshot.id} ({changed} shifts changed). Previous state saved as #{undo.id}."
+    if skipped:
+        message += f" {skipped} shifts were left as they are because their worker has been deleted."
+    flash(message, "success")
+    return redirect(url_for("schedule_history", year=snapshot.first_day.year, month=snapshot.first_day.month))
 
 @app.route('/generate', methods=['GET', 'POST'])
+@login_required
 def generate():
     if request.method == 'POST':
         # Get month and year from the form
@@ -329,10 +452,12 @@ def generate():
         except (ValueError, TypeError):
             return "Invalid month or year", 400
 
-        # Call your monthly optimizer
-        build_monthly_optimizer(year, month)
-
-        return redirect(url_for('dashboard_manager'))  # Or wherever you want to display results
+        # Run the monthly optimizer in the background and watch it on the progress page
+        try:
+            job = solver_jobs.start_job(app, current_user.business_id, year, month)
+        except solver_jobs.SolverBusyError as e:
+            return str(e), 503
+        return redirect(url_for('generate_progress', job_id=job.id))
 
     # Defaults for month/year selector
     current_year = datetime.now().year
@@ -344,6 +469,159 @@ def generate():
         current_year=current_year
     )
 
+@app.route('/generate/<int:job_id>')
+@login_required
+def generate_progress(job_id):
+    job = solver_jobs.get_job(job_id, current_user.business_id)
+    if job is None:
+        abort(404)
+    return render_template('generate_progress.html', job=job)
+
+@app.route('/generate/<int:job_id>/events')
+@login_required
+def generate_events(job_id):
+    job = solver_jobs.get_job(job_id, current_user.business_id)
+    if job is None:
+        abort(404)
+
+    # Browsers resend the last id they saw when the stream reconnects
+    last_event_id = request.headers.get('Last-Event-ID', type=int, default=0)
+    return Response(
+        solver_jobs.stream(db.engine, job.id, last_event_id),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@app.route('/scenarios/<int:year>/<int:month>', methods=['POST'])
+@login_required
+def what_if_scenarios(year, month):
+    """Solve what-if copies of a month in parallel; the real schedule is never changed."""
+    payload = request.get_json(silent=True) or {}
+    if not isinstance(payload, dict):
+        return jsonify(error="Send a JSON object"), 400
+    scenarios = payload.get('scenarios') or [{"name": "baseline"}]
+    if not isinstance(scenarios, list) or len(scenarios) > MAX_SCENARIOS:
+        return jsonify(error=f"Send a list of at most {MAX_SCENARIOS} scenarios"), 400
+
+    try:
+        time_limit = float(payload.get('time_limit', SCENARIO_TIME_LIMIT))
+    except (TypeError, ValueError):
+        time_limit = math.nan
+    if not (math.isfinite(time_limit) and time_limit > 0):
+        return jsonify(error="time_limit must be a positive number of seconds"), 400
+
+    try:
+        results = run_scenarios(year, month, scenarios, time_limit=min(time_limit, SCENARIO_TIME_LIMIT))
+    except ScenarioError as e:
+        return jsonify(error=str(e)), 400
+    except ScenarioPoolError as e:
+        return jsonify(error=str(e)), 503
+    return jsonify(year=year, month=month, scenarios=results)
+
+@app.route('/open_shifts')
+@login_required
+def open_shifts():
+    current_worker = Worker.query.filter_by(user_id=current_user.id).first()
+    today = date.today()
+    month = request.args.get('month', type=int, default=today.month)
+    year = request.args.get('year', type=int, default=today.year)
+    first_day, last_day = get_month_range(year, month)
+
+    shifts = Shift.query.filter(
+        Shift.date.between(max(first_day, today), last_day),
+        Shift.worker_id.is_(None)
+    ).order_by(Shift.date, Shift.start_time).all()
+
+    # Pair each open shift with why this worker can't take it (empty if they can)
+    index = eligibility.get_index(first_day)
+    rows = [
+        (s, index.reasons(current_worker.id, s) if current_worker else ["no worker profile"])
+        for s in shifts
+    ]
+    return render_template('open_shifts.html', rows=rows, year=year, month=month)
+
+@app.route('/open_shifts/<int:shift_id>/claim', methods=['POST'])
+@login_required
+def claim_open_shift(shift_id):
+    shift = Shift.query.get_or_404(shift_id)
+    current_worker = Worker.query.filter_by(user_id=current_user.id).first_or_404()
+    try:
+        eligibility.assign_shift(shift, current_worker.id, expected_worker_id=None)
+        flash("Shift picked up.", "success")
+    except ShiftClaimError as e:
+        flash(str(e), "danger")
+    return redirect(url_for('open_shifts', year=shift.date.year, month=shift.date.month))
+
+@app.route('/shifts/<int:shift_id>/cover')
+@login_required
+def cover_shift(shift_id):
+    if current_user.role != 'manager':
+        abort(403)
+    shift = Shift.query.options(joinedload(Shift.worker)).get_or_404(shift_id)
+    index = eligibility.get_index(shift.date)
+    exclude = [shift.worker_id] if shift.worker_id else []
+    return render_template(
+        'cover_shift.html',
+        shift=shift,
+        eligible=index.eligible_workers(shift, exclude=exclude),
+        swaps=eligibility.swap_candidates(shift)
+    )
+
+@app.route('/shifts/<int:shift_id>/assign', methods=['POST'])
+@login_required
+def assign_shift(shift_id):
+    if current_user.role != 'manager':
+        abort(403)
+    shift = Shift.query.get_or_404(shift_id)
+    worker_id = request.form.get('worker_id', type=int)
+    # The holder the manager saw; if it changed since, the assignment is refused
+    expected_worker_id = request.form.get('expected_worker_id', type=int)
+    try:
+        eligibility.assign_shift(shift, worker_id, expected_worker_id=expected_worker_id)
+        flash("Shift reassigned.", "success")
+    except ShiftClaimError as e:
+        flash(str(e), "danger")
+    return redirect(url_for('dashboard_manager', year=shift.date.year, month=shift.date.month))
+
+@app.route('/shifts/<int:shift_id>/swap', methods=['POST'])
+@login_required
+def swap_shift(shift_id):
+    if current_user.role != 'manager':
+        abort(403)
+    shift = Shift.query.get_or_404(shift_id)
+    other = Shift.query.get_or_404(request.form.get('other_shift_id', type=int))
+    try:
+        eligibility.swap_shifts(shift, other)
+        flash("Shifts swapped.", "success")
+    except ShiftClaimError as e:
+        flash(str(e), "danger")
+    return redirect(url_for('dashboard_manager', year=shift.date.year, month=shift.date.month))
+
+@app.route('/publish/<int:year>/<int:month>', methods=['POST'])
+@login_required
+def publish(year, month):
+    notified = publish_schedule(year, month)
+    flash(f"Schedule published. {notified} workers notified.", "success")
+    return redirect(url_for('dashboard_manager', year=year, month=month))
+
+@app.route('/inbox')
+@login_required
+def inbox():
+    current_worker = Worker.query.filter_by(user_id=current_user.id).first_or_404()
+    notifications = Notification.query.filter_by(worker_id=current_worker.id).order_by(
+        Notification.created_at.desc()
+    ).limit(50).all()
+
+    # Rendered with their unread state first: the commit below would expire
+    # every row and reload each one as already read
+    page = render_template('inbox.html', notifications=notifications)
+    Notification.query.filter(
+        Notification.worker_id == current_worker.id,
+        Notification.read_at.is_(None)
+    ).update({Notification.read_at: datetime.utcnow()}, synchronize_session=False)
+    db.session.commit()
+    return page
+
 @app.route("/availability", methods=["GET", "POST"])
 @login_required
 def set_availability():
@@ -378,6 +656,7 @@ def set_availability():
     return render_template("availability.html", unavailable_days=unavailable_days)
 
 @app.route('/toggle_cart_staff/<int:worker_id>', methods=['POST'])
+@login_required
 def toggle_cart_staff(worker_id):
     worker = Worker.query.get_or_404(worker_id)
     worker.is_cart_staff = not worker.is_cart_staff
@@ -385,6 +664,7 @@ def toggle_cart_staff(worker_id):
     return redirect(url_for('manage_workers'))
 
 @app.route('/toggle_turn_grill_staff/<int:worker_id>', methods=['POST'])
+@login_required
 def toggle_turn_grill_staff(worker_id):
     worker = Worker.query.get_or_404(worker_id)
     worker.is_turn_grill_staff = not worker.is_turn_grill_staff
@@ -392,6 +672,7 @@ def toggle_turn_grill_staff(worker_id):
     return redirect(url_for('manage_workers'))
 
 @app.route("/plan_schedule/<int:year>/<int:month>", methods=["GET", "POST"])
+@login_required
 def plan_schedule(year, month):
     if request.method == "POST":
         shift_date = datetime.strptime(request.form.get("date"), "%Y-%m-%d").date()
@@ -414,9 +695,9 @@ def plan_schedule(year, month):
     days = list(calendar.Calendar().itermonthdates(year, month))
 
     # query shifts for that month
-    shifts = Shift.query.filter(
-        extract("year", Shift.date) == year,
-        extract("month", Shift.date) == month
+    first_day, last_day = get_month_range(year, month)
+    shifts = Shift.query.options(joinedload(Shift.worker)).filter(
+        Shift.date.between(first_day, last_day)
     ).all()
 
     # group shifts by day
@@ -448,6 +729,7 @@ def plan_schedule(year, month):
     )
 
 @app.route("/shift_templates", methods=["GET", "POST"])
+@login_required
 def shift_templates():
     if request.method == "POST":
         name = request.form.get("name")
@@ -469,6 +751,7 @@ def shift_templates():
     return render_template("shift_templates.html", templates=templates, now=date.today())
 
 @app.route("/add_weekday_shifts/<int:year>/<int:month>", methods=["POST"])
+@login_required
 def add_weekday_shifts(year, month):
     weekday = int(request.form.get("weekday"))  # 0=Mon, 6=Sun
     template_id = request.form.get("template_id")
@@ -498,6 +781,7 @@ def add_weekday_shifts(year, month):
     return redirect(url_for("plan_schedule", year=year, month=month))
 
 @app.route("/delete_shift/<int:shift_id>", methods=["POST"])
+@login_required
 def delete_shift(shift_id):
     shift = Shift.query.get_or_404(shift_id)
     year = shift.date.year
@@ -510,11 +794,12 @@ def delete_shift(shift_id):
     return redirect(url_for("plan_schedule", year=year, month=month))
 
 @app.route("/delete_all_shifts/<int:year>/<int:month>", methods=["POST"])
+@login_required
 def delete_all_shifts(year, month):
     # Delete all shifts in this year/month
+    first_day, last_day = get_month_range(year, month)
     Shift.query.filter(
-        extract("year", Shift.date) == year,
-        extract("month", Shift.date) == month
+        Shift.date.between(first_day, last_day)
     ).delete(synchronize_session=False)
 
     db.session.commit()
@@ -522,6 +807,34 @@ def delete_all_shifts(year, month):
 
     return redirect(url_for("plan_schedule", year=year, month=month))
 
+@app.cli.command("create-business")
+@click.argument("name")
+@click.argument("manager_username")
+def create_business(name, manager_username):
+    """Add a business and its first manager account."""
+    business = Business(name=name)
+    db.session.add(business)
+    db.session.flush()
+
+    password = generate_random_password()
+    with business_scope(business.id):
+        manager = User(username=manager_username, role="manager")
+        manager.set_password(password)
+        db.session.add(manager)
+        db.session.commit()
+
+    click.echo(f"Business {business.id} created. Username: {manager_username}, Password: {password}")
+
+@app.cli.command("optimize-all")
+@click.argument("year", type=int)
+@click.argument("month", type=int)
+@click.option("--workers", default=4, help="businesses solved in parallel")
+def optimize_all(year, month, workers):
+    """Run the monthly optimizer for every business in parallel."""
+    results = build_all_business_optimizers(year, month, max_workers=workers)
+    for business_id, summary in results.items():
+        click.echo(f"business {business_id}: {summary['status']} ({summary['assigned']}/{summary['shifts']} shifts)")
+
 print(app.url_map)
 
 if __name__ == '__main__':
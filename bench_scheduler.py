@@ -0,0 +1,234 @@
+"""
+Reproducible scheduler benchmark.
+
+Generates synthetic workers, availability and ShiftTemplate-based month plans
+in a throwaway SQLite database, runs each optimizer engine against them and
+prints the results as JSON.
+
+    python bench_scheduler.py                       # default sizes
+    python bench_scheduler.py --sizes 10 50 --output bench.json
+"""
+import argparse
+import calendar
+import json
+import multiprocessing
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from datetime import date, time as dtime
+from queue import Empty
+
+from flask import Flask
+
+from ai_scheduler import build_monthly_optimizer
+from metrics import metrics
+from models import db, Worker, Shift, ShiftTemplate, Business, business_scope
+
+
+DEFAULT_SIZES = [10, 25, 50, 100, 250, 500]
+
+# How often to check that a benchmark case's process is still alive
+CASE_POLL_SECONDS = 5
+
+# Optimizer engines to compare; each takes (year, month) inside an app context
+ENGINES = {
+    "pulp_cbc": build_monthly_optimizer,
+}
+
+# name, start, end, role_type
+TEMPLATES = [
+    ("Opener", dtime(9, 0), dtime(15, 0), "normal"),
+    ("Mid", dtime(11, 0), dtime(17, 0), "normal"),
+    ("Closer", dtime(15, 0), dtime(21, 15), "normal"),
+    ("Cart", dtime(10, 0), dtime(16, 0), "cart"),
+    ("Turn Grill", dtime(11, 0), dtime(17, 0), "turn_grill"),
+]
+
+
+def create_bench_app(db_uri):
+    bench_app = Flask(__name__)
+    bench_app.config["SQLALCHEMY_DATABASE_URI"] = db_uri
+    bench_app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    db.init_app(bench_app)
+    return bench_app
+
+
+def generate_workload(num_workers, year, month, seed=0,
+                      cart_ratio=0.25, turn_grill_ratio=0.2,
+                      unavailable_density=0.15, shifts_per_worker_week=3):
+    """
+    Insert a synthetic month for the business in scope.
+    Shift counts scale with staff so every size is a comparable problem:
+    each worker is planned for about shifts_per_worker_week shifts a week.
+    Every day's shifts are drawn so that some assignment covers them all,
+    keeping each size feasible and its numbers meaningful.
+    """
+    rng = random.Random(seed)
+    _, days_in_month = calendar.monthrange(year, month)
+    dates = [f"{year:04d}-{month:02d}-{d:02d}" for d in range(1, days_in_month + 1)]
+
+    templates = [
+        ShiftTemplate(name=name, start_time=start, end_time=end, role_type=role)
+        for name, start, end, role in TEMPLATES
+    ]
+    db.session.add_all(templates)
+
+    workers = []
+    for i in range(num_workers):
+        unavailable = [d for d in dates if rng.random() < unavailable_density]
+        workers.append(Worker(
+            name=f"Worker {i}",
+            is_cart_staff=rng.random() < cart_ratio,
+            is_turn_grill_staff=rng.random() < turn_grill_ratio,
+            unavailable_days=json.dumps(unavailable),
+        ))
+    # Small staffs can roll no holder of a role at all
+    if not any(w.is_cart_staff for w in workers):
+        workers[0].is_cart_staff = True
+    if not any(w.is_turn_grill_staff for w in workers):
+        workers[-1].is_turn_grill_staff = True
+    db.session.add_all(workers)
+
+    # Roughly match role demand to the share of staff holding each flag
+    by_role = {role: [t for t in templates if t.role_type == role]
+               for role in ("normal", "cart", "turn_grill")}
+    role_weights = {
+        "normal": 1.0,
+        "cart": cart_ratio * 0.5,
+        "turn_grill": turn_grill_ratio * 0.5,
+    }
+    roles = list(role_weights)
+    weights = [role_weights[r] for r in roles]
+
+    per_day = max(1, round(num_workers * shifts_per_worker_week / 7))
+    shifts = []
+    for d in range(1, days_in_month + 1):
+        day = dates[d - 1]
+        free = [w for w in workers if day not in json.loads(w.unavailable_days)]
+        rng.shuffle(free)
+        for role in rng.choices(roles, weights=weights, k=per_day):
+            # Reserve a distinct available worker for each shift; a role shift
+            # nobody free can work that day becomes a normal shift instead
+            holder = next((w for w in free if role == "normal"
+                           or (role == "cart" and w.is_cart_staff)
+                           or (role == "turn_grill" and w.is_turn_grill_staff)), None)
+            if holder is None:
+                if not free:
+                    break
+                role, holder = "normal", free[0]
+            free.remove(holder)
+            template = rng.choice(by_role[role])
+            shifts.append(Shift(
+                date=date(year, month, d),
+                start_time=template.start_time,
+                end_time=template.end_time,
+                role_type=template.role_type,
+            ))
+    db.session.add_all(shifts)
+    db.session.commit()
+    return {"workers": num_workers, "planned_shifts": len(shifts)}
+
+
+def _peak_rss_mb(who):
+    peak = resource.getrusage(who).ru_maxrss
+    # ru_maxrss is kilobytes on Linux and bytes on macOS
+    if sys.platform == "darwin":
+        return round(peak / (1024 * 1024), 2)
+    return round(peak / 1024, 2)
+
+
+def _run_case(engine, num_workers, year, month, seed, queue):
+    with tempfile.TemporaryDirectory() as tmp:
+        bench_app = create_bench_app(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        with bench_app.app_context():
+            db.create_all()
+            business = Business(name="Benchmark")
+            db.session.add(business)
+            db.session.commit()
+
+            with business_scope(business.id):
+                start = time.perf_counter()
+                workload = generate_workload(num_workers, year, month, seed=seed)
+                generate_seconds = time.perf_counter() - start
+
+                metrics.enabled = True
+                start = time.perf_counter()
+                # Keep the optimizer's progress prints out of the JSON on stdout
+                with redirect_stdout(sys.stderr):
+                    summary = ENGINES[engine](year, month)
+                total_seconds = time.perf_counter() - start
+
+            phases = {dict(labels)["phase"]: round(seconds, 4)
+                      for labels, seconds in metrics.sums("grilgo_optimizer_phase_seconds").items()}
+
+    queue.put({
+        "engine": engine,
+        "seed": seed,
+        **workload,
+        "model": summary,
+        "generate_seconds": round(generate_seconds, 4),
+        "total_seconds": round(total_seconds, 4),
+        "phase_seconds": phases,
+        # Peak of this Python process only. CBC runs as a child, but Linux
+        # children inherit the parent's high-water mark, so RUSAGE_CHILDREN
+        # can't isolate the solver's own peak.
+        "peak_rss_mb": _peak_rss_mb(resource.RUSAGE_SELF),
+    })
+
+
+def run_benchmark(sizes, engines, year, month, seed=0):
+    """Run every (engine, size) case in a fresh process so memory peaks don't leak across runs."""
+    ctx = multiprocessing.get_context("spawn")
+    results = []
+    for engine in engines:
+        for num_workers in sizes:
+            queue = ctx.Queue()
+            proc = ctx.Process(target=_run_case, args=(engine, num_workers, year, month, seed, queue))
+            proc.start()
+            result = None
+            # Poll so a crashed case fails the run instead of hanging it
+            while result is None:
+                try:
+                    result = queue.get(timeout=CASE_POLL_SECONDS)
+                except Empty:
+                    if not proc.is_alive():
+                        raise RuntimeError(
+                            f"{engine} workers={num_workers} exited with code {proc.exitcode} before reporting"
+                        )
+            proc.join()
+            print(f"{engine} workers={num_workers}: {result['total_seconds']}s", file=sys.stderr)
+            results.append(result)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the monthly schedule optimizer.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--engines", nargs="+", choices=sorted(ENGINES), default=sorted(ENGINES))
+    parser.add_argument("--year", type=int, default=2025)
+    parser.add_argument("--month", type=int, default=7)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    report = {
+        "python": sys.version.split()[0],
+        "year": args.year,
+        "month": args.month,
+        "results": run_benchmark(args.sizes, args.engines, args.year, args.month, args.seed),
+    }
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,365 @@
+"""
+Who can take a shift, answered from an in-memory index instead of the optimizer.
+
+The index keeps, per business and month, each worker's role flags and
+unavailable days, the days they already work and their scheduled minutes
+per ISO week. It is kept current from ORM flushes: changes are applied when
+the transaction commits, and bulk UPDATE/DELETE statements simply drop the
+business's cached months so they rebuild on next use.
+
+The index is a per-process cache used for listing candidates and for quick
+feedback. It can't see commits made by another process, so every claim is
+checked again against the database inside its own transaction before it
+commits.
+"""
+import json
+import threading
+from collections import OrderedDict, defaultdict
+from datetime import datetime, timedelta
+
+from sqlalchemy import event, update
+from sqlalchemy.orm import Session, joinedload
+
+from helpers import get_month_range
+from models import db, Shift, Worker, get_current_business_id
+
+
+MAX_WEEKLY_HOURS = 20
+
+# Cached (business, year, month) indexes; least recently used are dropped first
+MAX_CACHED_MONTHS = 64
+
+_indexes = OrderedDict()
+_indexes_lock = threading.Lock()
+
+
+class ShiftClaimError(Exception):
+    """A pickup, reassignment or swap lost a race or broke an eligibility rule."""
+
+
+def shift_minutes(shift):
+    start = datetime.combine(shift.date, shift.start_time)
+    end = datetime.combine(shift.date, shift.end_time)
+    if end <= start:
+        end += timedelta(days=1)
+    return int((end - start).total_seconds() // 60)
+
+
+def _week(day):
+    iso = day.isocalendar()
+    return iso[0], iso[1]
+
+
+def _parse_unavailable(raw):
+    try:
+        return frozenset(json.loads(raw or "[]"))
+    except json.JSONDecodeError:
+        return frozenset()
+
+
+class EligibilityIndex:
+    """Eligibility facts for one business over the weeks touching one month."""
+
+    def __init__(self, business_id, first_day, last_day):
+        self.business_id = business_id
+        # Whole weeks, so weekly hours are right at month edges
+        self.first_day = first_day - timedelta(days=first_day.weekday())
+        self.last_day = last_day + timedelta(days=6 - last_day.weekday())
+        self.lock = threading.RLock()
+
+        self.workers = {}                      # worker_id -> (is_cart, is_turn_grill, unavailable dates)
+        self.names = {}                        # worker_id -> name
+        self.shifts = {}                       # shift_id -> (worker_id, date, minutes)
+        self.days = defaultdict(set)           # (worker_id, date) -> shift ids
+        self.weekly = defaultdict(int)         # (worker_id, iso week) -> minutes
+
+    def load(self, worker_ids=None):
+        """Fill from the database; worker_ids limits it to those workers."""
+        workers = db.session.query(Worker.id, Worker.name, Worker.is_cart_staff,
+                                   Worker.is_turn_grill_staff, Worker.unavailable_days)
+        rows = db.session.query(Shift.id, Shift.worker_id, Shift.date, Shift.start_time, Shift.end_time).filter(
+            Shift.date.between(self.first_day, self.last_day),
+            Shift.worker_id.isnot(None)
+        )
+        if worker_ids is not None:
+            workers = workers.filter(Worker.id.in_(worker_ids))
+            rows = rows.filter(Shift.worker_id.in_(worker_ids))
+
+        for w in workers:
+            self.set_worker(w.id, w.name, w.is_cart_staff, w.is_turn_grill_staff, w.unavailable_days)
+        for row in rows:
+            self.set_shift(row.id, row.worker_id, row.date, shift_minutes(row))
+        return self
+
+    def covers(self, day):
+        return self.first_day <= day <= self.last_day
+
+    # --- maintenance -----------------------------------------------------
+
+    def set_worker(self, worker_id, name, is_cart, is_turn_grill, unavailable_days):
+        self.workers[worker_id] = (bool(is_cart), bool(is_turn_grill), _parse_unavailable(unavailable_days))
+        self.names[worker_id] = name
+
+    def set_shift(self, shift_id, worker_id, day, minutes):
+        self.remove_shift(shift_id)
+        if worker_id is None or not self.covers(day):
+            return
+        self.shifts[shift_id] = (worker_id, day, minutes)
+        self.days[(worker_id, day)].add(shift_id)
+        self.weekly[(worker_id, _week(day))] += minutes
+
+    def remove_shift(self, shift_id):
+        old = self.shifts.pop(shift_id, None)
+        if old is None:
+            return
+        worker_id, day, minutes = old
+        self.days[(worker_id, day)].discard(shift_id)
+        self.weekly[(worker_id, _week(day))] -= minutes
+
+    # --- queries ---------------------------------------------------------
+
+    def reasons(self, worker_id, shift, releasing=()):
+        """
+        Why worker_id can't take shift; an empty list means eligible.
+        Shifts in releasing are ones the worker would give up (e.g. in a swap).
+        """
+        with self.lock:
+            return self._reasons(worker_id, shift, releasing)
+
+    def _reasons(self, worker_id, shift, releasing):
+        worker = self.workers.get(worker_id)
+        if worker is None:
+            return ["unknown worker"]
+        is_cart, is_turn_grill, unavailable = worker
+        problems = []
+
+        if shift.role_type == "cart" and not is_cart:
+            problems.append("not cart staff")
+        if shift.role_type == "turn_grill" and not is_turn_grill:
+            problems.append("not turn-grill staff")
+        if shift.date.isoformat() in unavailable:
+            problems.append("unavailable")
+
+        ignored = set(releasing) | {shift.id}
+        if self.days.get((worker_id, shift.date), set()) - ignored:
+            problems.append("already working that day")
+
+        week = _week(shift.date)
+        minutes = self.weekly.get((worker_id, week), 0) + shift_minutes(shift)
+        for shift_id in ignored:
+            held = self.shifts.get(shift_id)
+            if held and held[0] == worker_id and _week(held[1]) == week:
+                minutes -= held[2]
+        if minutes > MAX_WEEKLY_HOURS * 60:
+            problems.append(f"over {MAX_WEEKLY_HOURS} hours that week")
+        return problems
+
+    def eligible_workers(self, shift, exclude=()):
+        """[(worker_id, name)] who could take shift, by name."""
+        with self.lock:
+            return sorted(
+                ((worker_id, self.names[worker_id]) for worker_id in self.workers
+                 if worker_id not in exclude and not self._reasons(worker_id, shift, ())),
+                key=lambda pair: pair[1]
+            )
+
+
+def get_index(day):
+    """Index for the current business's month containing day, building it on first use."""
+    business_id = get_current_business_id()
+    key = (business_id, day.year, day.month)
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is not None:
+            _indexes.move_to_end(key)
+            return index
+
+        # Registered before it loads, so a commit landing mid-load isn't lost:
+        # its changes wait on index.lock and are applied on top (they're idempotent).
+        # Readers wait on the same lock until the index is filled.
+        first_day, last_day = get_month_range(day.year, day.month)
+        index = EligibilityIndex(business_id, first_day, last_day)
+        index.lock.acquire()
+        _indexes[key] = index
+        while len(_indexes) > MAX_CACHED_MONTHS:
+            _indexes.popitem(last=False)
+
+    try:
+        index.load()
+    except Exception:
+        with _indexes_lock:
+            if _indexes.get(key) is index:
+                del _indexes[key]
+        raise
+    finally:
+        index.lock.release()
+    return index
+
+
+def _indexes_for(business_id):
+    with _indexes_lock:
+        return [index for (bid, _, _), index in _indexes.items() if bid == business_id]
+
+
+def invalidate(business_id=None):
+    with _indexes_lock:
+        for key in list(_indexes):
+            if business_id is None or key[0] == business_id:
+                del _indexes[key]
+
+
+# --- keeping the index current -------------------------------------------
+
+def _pending(session):
+    return session.info.setdefault("eligibility_changes", [])
+
+
+def record_shift(session, shift_id, business_id, worker_id, day, minutes):
+    _pending(session).append(("shift", business_id, shift_id, worker_id, day, minutes))
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changes(session, flush_context):
+    changes = _pending(session)
+    for obj in list(session.new) + list(session.dirty):
+        if isinstance(obj, Shift):
+            changes.append(("shift", obj.business_id, obj.id, obj.worker_id, obj.date, shift_minutes(obj)))
+        elif isinstance(obj, Worker):
+            changes.append(("worker", obj.business_id, obj.id, obj.name, obj.is_cart_staff,
+                            obj.is_turn_grill_staff, obj.unavailable_days))
+    for obj in session.deleted:
+        if isinstance(obj, Shift):
+            changes.append(("shift_deleted", obj.business_id, obj.id))
+        elif isinstance(obj, Worker):
+            # Their shifts go with them (ON DELETE CASCADE), so rebuild
+            changes.append(("invalidate", obj.business_id))
+
+
+@event.listens_for(Session, "after_bulk_update")
+@event.listens_for(Session, "after_bulk_delete")
+def _collect_bulk_change(context):
+    if context.mapper.class_ in (Shift, Worker):
+        _pending(context.session).append(("invalidate", get_current_business_id()))
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_changes(session):
+    changes = session.info.pop("eligibility_changes", [])
+    for change in changes:
+        kind, business_id = change[0], change[1]
+        if kind == "invalidate":
+            invalidate(business_id)
+            continue
+        for index in _indexes_for(business_id):
+            with index.lock:
+                if kind == "shift":
+                    index.set_shift(*change[2:])
+                elif kind == "shift_deleted":
+                    index.remove_shift(change[2])
+                elif kind == "worker":
+                    index.set_worker(*change[2:])
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changes(session):
+    session.info.pop("eligibility_changes", None)
+
+
+# --- atomic claims -------------------------------------------------------
+
+def _compare_and_set(shift, expected_worker_id, new_worker_id):
+    """Reassign shift only if it is still held by expected_worker_id."""
+    table = Shift.__table__
+    holder = table.c.worker_id.is_(None) if expected_worker_id is None else table.c.worker_id == expected_worker_id
+    result = db.session.execute(
+        update(table)
+        .where(table.c.id == shift.id, table.c.business_id == shift.business_id, holder)
+        .values(worker_id=new_worker_id)
+    )
+    if result.rowcount != 1:
+        raise ShiftClaimError("That shift was just taken or changed. Refresh and try again.")
+    record_shift(db.session, shift.id, shift.business_id, new_worker_id, shift.date, shift_minutes(shift))
+
+
+def _check(index, worker_id, shift, releasing=()):
+    problems = index.reasons(worker_id, shift, releasing)
+    if problems:
+        raise ShiftClaimError(f"{index.names.get(worker_id, 'Worker')} can't take this shift: {', '.join(problems)}.")
+
+
+def _commit_claim(claims):
+    """
+    Commit [(shift, new worker id)] claims once they pass every rule against
+    the database as it stands inside this transaction, or roll back. This
+    catches concurrent claims the cached index hasn't seen yet, such as two
+    pickups on different days that together go over the weekly cap.
+    """
+    worker_ids = sorted({worker_id for _, worker_id in claims})
+    # Serialize claims for the same workers where the database supports row
+    # locks; SQLite already serializes writers
+    db.session.query(Worker.id).filter(Worker.id.in_(worker_ids)).order_by(Worker.id).with_for_update().all()
+
+    days = [shift.date for shift, _ in claims]
+    current = EligibilityIndex(claims[0][0].business_id, min(days), max(days)).load(worker_ids)
+    for shift, worker_id in claims:
+        # The claims are already written, so nothing is being released
+        problems = current.reasons(worker_id, shift)
+        if problems:
+            db.session.rollback()
+            raise ShiftClaimError(
+                f"Someone else's change got there first ({', '.join(problems)}). Refresh and try again."
+            )
+    db.session.commit()
+
+
+def assign_shift(shift, worker_id, expected_worker_id):
+    """
+    Give shift to worker_id, provided it is still held by expected_worker_id
+    (None for an open shift) and the worker is eligible.
+    """
+    index = get_index(shift.date)
+    _check(index, worker_id, shift)
+    try:
+        _compare_and_set(shift, expected_worker_id, worker_id)
+    except ShiftClaimError:
+        db.session.rollback()
+        raise
+    _commit_claim([(shift, worker_id)])
+
+
+def swap_shifts(shift_a, shift_b):
+    """Exchange the workers on two assigned shifts, all or nothing."""
+    worker_a, worker_b = shift_a.worker_id, shift_b.worker_id
+    if worker_a is None or worker_b is None or worker_a == worker_b:
+        raise ShiftClaimError("Both shifts need different assigned workers to swap.")
+
+    _check(get_index(shift_a.date), worker_b, shift_a, releasing=[shift_b.id])
+    _check(get_index(shift_b.date), worker_a, shift_b, releasing=[shift_a.id])
+    try:
+        _compare_and_set(shift_a, worker_a, worker_b)
+        _compare_and_set(shift_b, worker_b, worker_a)
+    except ShiftClaimError:
+        db.session.rollback()
+        raise
+    _commit_claim([(shift_a, worker_b), (shift_b, worker_a)])
+
+
+def swap_candidates(shift):
+    """Assigned shifts in the same week whose workers could trade with shift's worker."""
+    if shift.worker_id is None:
+        return []
+    index = get_index(shift.date)
+    week_start = shift.date - timedelta(days=shift.date.weekday())
+    others = Shift.query.options(joinedload(Shift.worker)).filter(
+        Shift.date.between(week_start, week_start + timedelta(days=6)),
+        Shift.worker_id.isnot(None),
+        Shift.worker_id != shift.worker_id
+    ).order_by(Shift.date, Shift.start_time).all()
+
+    candidates = []
+    for other in others:
+        other_index = index if index.covers(other.date) else get_index(other.date)
+        if (not index.reasons(other.worker_id, shift, releasing=[other.id])
+                and not other_index.reasons(shift.worker_id, other, releasing=[shift.id])):
+            candidates.append(other)
+    return candidates
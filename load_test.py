@@ -0,0 +1,333 @@
+"""
+Local HTTP load test.
+
+Seeds a realistic database, starts gunicorn against it, logs in a crowd of
+employees and managers and drives the calendar, availability and planning
+routes concurrently. Reports throughput and p50/p95/p99 latency per route and
+exits non-zero when any route goes over its SQL query budget.
+
+    python load_test.py
+    python load_test.py --users 200 --requests 30 --budget dashboard_employee=6
+"""
+import argparse
+import json
+import os
+import random
+import shlex
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from http.cookiejar import CookieJar
+
+from werkzeug.security import generate_password_hash
+
+from bench_scheduler import create_bench_app, generate_workload
+from metrics import PROFILE_HEADER
+from models import db, Worker, Shift, User, ShiftTemplate, Business, business_scope
+
+
+PASSWORD = "load-test"
+
+# Max SQL statements a single request may issue, keyed by route name
+DEFAULT_BUDGETS = {
+    "login": 2,
+    "dashboard_employee": 5,
+    "dashboard_manager": 5,
+    "availability": 3,
+    "availability_save": 4,
+    "plan_schedule": 5,
+    "plan_schedule_add": 5,
+}
+
+
+def seed_database(db_uri, num_employees, num_managers, year, month, seed=0):
+    """Create one business with workers, a month of shifts (mostly assigned) and login accounts."""
+    rng = random.Random(seed)
+    seed_app = create_bench_app(db_uri)
+    with seed_app.app_context():
+        db.create_all()
+        business = Business(name="Load Test")
+        db.session.add(business)
+        db.session.commit()
+
+        with business_scope(business.id):
+            generate_workload(num_employees, year, month, seed=seed)
+
+            # Hash once; every account shares the password so seeding stays fast
+            password_hash = generate_password_hash(PASSWORD, method='pbkdf2:sha256')
+
+            employees = []
+            for worker in Worker.query.all():
+                user = User(username=f"employee{worker.id}", password_hash=password_hash, role="employee")
+                worker.user = user
+                employees.append(user.username)
+
+            managers = []
+            for i in range(num_managers):
+                user = User(username=f"manager{i}", password_hash=password_hash, role="manager")
+                db.session.add(user)
+                managers.append(user.username)
+
+            worker_ids = [w.id for w in Worker.query.all()]
+            for shift in Shift.query.all():
+                if rng.random() < 0.9:
+                    shift.worker_id = rng.choice(worker_ids)
+
+            db.session.commit()
+            template_ids = [t.id for t in ShiftTemplate.query.all()]
+
+    return employees, managers, template_ids
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    # Time only the request itself, not the page it redirects to
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class Client:
+    """One logged-in browser session."""
+
+    def __init__(self, base_url):
+        self.base_url = base_url
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(CookieJar()), _NoRedirect()
+        )
+
+    def request(self, path, data=None):
+        """Return (status, seconds, sql query count)."""
+        body = urllib.parse.urlencode(data).encode() if data is not None else None
+        req = urllib.request.Request(self.base_url + path, data=body, headers={PROFILE_HEADER: "1"})
+        start = time.perf_counter()
+        try:
+            with self.opener.open(req) as resp:
+                resp.read()
+                status, headers = resp.status, resp.headers
+        except urllib.error.HTTPError as e:
+            e.read()
+            status, headers = e.code, e.headers
+        elapsed = time.perf_counter() - start
+        return status, elapsed, _query_count(headers.get("Server-Timing", ""))
+
+    def login(self, username):
+        return self.request("/", {"username": username, "password": PASSWORD})
+
+
+def _query_count(server_timing):
+    for part in server_timing.split(","):
+        if part.strip().startswith("sql;"):
+            for field in part.split(";"):
+                if field.startswith("desc="):
+                    return int(field[len('desc="'):].split()[0])
+    return None
+
+
+def employee_session(client, year, month, rng):
+    """One employee action: mostly checking the calendar, sometimes availability."""
+    roll = rng.random()
+    if roll < 0.7:
+        return "dashboard_employee", client.request(f"/dashboard_employee?year={year}&month={month}")
+    if roll < 0.9:
+        return "availability", client.request("/availability")
+    days = sorted(rng.sample(range(1, 29), 3))
+    unavailable = json.dumps([date(year, month, d).isoformat() for d in days])
+    return "availability_save", client.request("/availability", {"unavailable_days": unavailable})
+
+
+def manager_session(client, year, month, rng, template_ids):
+    """One manager action: viewing the month or adding a planned shift."""
+    roll = rng.random()
+    if roll < 0.4:
+        return "dashboard_manager", client.request(f"/dashboard/manager?year={year}&month={month}")
+    if roll < 0.85 or not template_ids:
+        return "plan_schedule", client.request(f"/plan_schedule/{year}/{month}")
+    form = {
+        "date": date(year, month, rng.randint(1, 28)).isoformat(),
+        "template_id": rng.choice(template_ids),
+    }
+    return "plan_schedule_add", client.request(f"/plan_schedule/{year}/{month}", form)
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def procfile_command(root):
+    """The Procfile's web command, so the test runs the configuration that ships."""
+    with open(os.path.join(root, "Procfile")) as f:
+        for line in f:
+            if line.startswith("web:"):
+                command = shlex.split(line[len("web:"):])
+                break
+        else:
+            raise RuntimeError("Procfile has no web process")
+    if command[0] != "gunicorn":
+        raise RuntimeError(f"Procfile web process isn't gunicorn: {command[0]}")
+    return [sys.executable, "-m", "gunicorn"] + command[1:]
+
+
+def start_gunicorn(db_uri, port, workers):
+    root = os.path.dirname(os.path.abspath(__file__))
+    env = dict(os.environ, DATABASE_URL=db_uri)
+    # --workers stands in for the WEB_CONCURRENCY a host would set
+    proc = subprocess.Popen(
+        procfile_command(root) + ["--workers", str(workers), "--bind", f"127.0.0.1:{port}", "--log-level", "warning"],
+        cwd=root,
+        env=env,
+        stdout=subprocess.DEVNULL,
+    )
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError("gunicorn exited during startup")
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return proc
+        except OSError:
+            time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError("gunicorn did not start listening in time")
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    index = max(0, int(round(pct / 100 * len(sorted_values))) - 1)
+    return sorted_values[index]
+
+
+def summarize(samples, wall_seconds, budgets):
+    routes = {}
+    violations = []
+    for route, results in sorted(samples.items()):
+        latencies = sorted(seconds for _, seconds, _ in results)
+        queries = [q for _, _, q in results if q is not None]
+        errors = sum(1 for status, _, _ in results if status >= 400)
+        max_queries = max(queries) if queries else None
+        budget = budgets.get(route)
+
+        routes[route] = {
+            "requests": len(results),
+            "errors": errors,
+            "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+            "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+            "max_queries": max_queries,
+            "query_budget": budget,
+        }
+        if budget is not None:
+            # A missing count means the guard can't run, so it fails rather than passes
+            uncounted = len(results) - len(queries)
+            if uncounted:
+                violations.append(f"{route}: {uncounted} responses without a Server-Timing query count "
+                                  f"(budget {budget}); is METRICS_ENABLED on?")
+            if max_queries is not None and max_queries > budget:
+                violations.append(f"{route}: {max_queries} queries (budget {budget})")
+        if errors:
+            violations.append(f"{route}: {errors} error responses")
+
+    total = sum(len(r) for r in samples.values())
+    return {
+        "requests": total,
+        "wall_seconds": round(wall_seconds, 2),
+        "throughput_rps": round(total / wall_seconds, 2) if wall_seconds else None,
+        "routes": routes,
+        "violations": violations,
+    }
+
+
+def run_load_test(args):
+    budgets = dict(DEFAULT_BUDGETS)
+    for item in args.budget:
+        route, _, limit = item.partition("=")
+        budgets[route] = int(limit)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_uri = f"sqlite:///{os.path.join(tmp, 'load.db')}"
+        employees, managers, template_ids = seed_database(
+            db_uri, args.users, args.managers, args.year, args.month, args.seed
+        )
+
+        port = _free_port()
+        server = start_gunicorn(db_uri, port, args.gunicorn_workers)
+        base_url = f"http://127.0.0.1:{port}"
+        samples = defaultdict(list)
+
+        try:
+            accounts = [(name, False) for name in employees] + [(name, True) for name in managers]
+            clients = {name: Client(base_url) for name, _ in accounts}
+
+            with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+                for result in pool.map(lambda acc: clients[acc[0]].login(acc[0]), accounts):
+                    samples["login"].append(result)
+
+            def drive(index_and_account):
+                index, (name, is_manager) = index_and_account
+                rng = random.Random(args.seed * 100003 + index)
+                results = []
+                for _ in range(args.requests):
+                    if is_manager:
+                        results.append(manager_session(clients[name], args.year, args.month, rng, template_ids))
+                    else:
+                        results.append(employee_session(clients[name], args.year, args.month, rng))
+                return results
+
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+                for results in pool.map(drive, enumerate(accounts)):
+                    for route, result in results:
+                        samples[route].append(result)
+            wall_seconds = time.perf_counter() - start
+        finally:
+            server.terminate()
+            server.wait()
+
+    # Logins are setup, not part of the timed rush
+    login_samples = samples.pop("login")
+    report = summarize(samples, wall_seconds, budgets)
+    login_report = summarize({"login": login_samples}, 0, budgets)
+    report["routes"]["login"] = login_report["routes"]["login"]
+    report["violations"] += login_report["violations"]
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the scheduler against gunicorn.")
+    parser.add_argument("--users", type=int, default=50, help="employee accounts to seed and log in")
+    parser.add_argument("--managers", type=int, default=2)
+    parser.add_argument("--requests", type=int, default=20, help="requests per logged-in user")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--gunicorn-workers", type=int, default=4)
+    parser.add_argument("--year", type=int, default=2025)
+    parser.add_argument("--month", type=int, default=7)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--budget", action="append", default=[], metavar="ROUTE=N",
+                        help="override a route's SQL query budget")
+    parser.add_argument("--output", help="write JSON here as well as stdout")
+    args = parser.parse_args(argv)
+
+    report = run_load_test(args)
+    json.dump(report, sys.stdout, indent=2)
+    print()
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if report["violations"]:
+        for violation in report["violations"]:
+            print(f"FAIL {violation}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import Response, g, has_request_context, request
+from flask import before_render_template, template_rendered
+
+
+# Upper bounds (seconds) shared by every latency histogram
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+PROFILE_HEADER = "X-Profile"
+
+
+class Histogram:
+    """Cumulative Prometheus-style histogram."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, upper in enumerate(self.buckets):
+            if value <= upper:
+                self.counts[i] += 1
+                break
+        self.total += value
+        self.count += 1
+
+
+class Metrics:
+    """
+    In-process request, SQL, template and optimizer timings.
+    Each gunicorn worker keeps its own registry; scrape them individually.
+    """
+
+    def __init__(self, app=None):
+        self.enabled = False
+        self._lock = threading.Lock()
+        self._histograms = {}  # (name, labels) -> Histogram
+        self._counters = {}    # (name, labels) -> float
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault("METRICS_ENABLED", True)
+        self.enabled = app.config["METRICS_ENABLED"]
+        if not self.enabled:
+            return
+
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+        before_render_template.connect(self._start_template, app)
+        template_rendered.connect(self._finish_template, app)
+        app.add_url_rule("/metrics", "metrics", self.export)
+
+    # --- recording -------------------------------------------------------
+
+    def observe(self, name, labels, value):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = self._histograms[key] = Histogram()
+            hist.observe(value)
+
+    def inc(self, name, labels, amount=1):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def sums(self, name):
+        """Total observed seconds per label set for one histogram."""
+        with self._lock:
+            return {
+                labels: hist.total
+                for (hist_name, labels), hist in self._histograms.items()
+                if hist_name == name
+            }
+
+    def _request_stats(self):
+        """Per-request accumulator, or None outside a request."""
+        if not has_request_context():
+            return None
+        return g.get("_metrics")
+
+    def _start_request(self):
+        g._metrics = {
+            "start": time.perf_counter(),
+            "sql_count": 0,
+            "sql_time": 0.0,
+            "template_time": 0.0,
+            "template_stack": [],
+            "phases": {},
+        }
+
+    def _finish_request(self, response):
+        stats = self._request_stats()
+        if stats is None:
+            return response
+
+        elapsed = time.perf_counter() - stats["start"]
+        endpoint = request.endpoint or "unmatched"
+        labels = {"endpoint": endpoint, "method": request.method}
+
+        self.observe("grilgo_request_duration_seconds", labels, elapsed)
+        self.inc("grilgo_requests_total", dict(labels, status=str(response.status_code)))
+        self.inc("grilgo_sql_queries_total", {"endpoint": endpoint}, stats["sql_count"])
+        self.inc("grilgo_sql_duration_seconds_total", {"endpoint": endpoint}, stats["sql_time"])
+
+        if request.headers.get(PROFILE_HEADER):
+            response.headers["Server-Timing"] = self._server_timing(stats, elapsed)
+        return response
+
+    def _server_timing(self, stats, elapsed):
+        parts = [
+            f'sql;dur={stats["sql_time"] * 1000:.2f};desc="{stats["sql_count"]} queries"',
+            f'template;dur={stats["template_time"] * 1000:.2f}',
+        ]
+        for phase, seconds in stats["phases"].items():
+            parts.append(f"optimizer-{phase};dur={seconds * 1000:.2f}")
+        parts.append(f"total;dur={elapsed * 1000:.2f}")
+        return ", ".join(parts)
+
+    def _start_template(self, sender, template, context, **extra):
+        stats = self._request_stats()
+        if stats is not None:
+            stats["template_stack"].append(time.perf_counter())
+
+    def _finish_template(self, sender, template, context, **extra):
+        stats = self._request_stats()
+        if stats is None or not stats["template_stack"]:
+            return
+        elapsed = time.perf_counter() - stats["template_stack"].pop()
+        # Only count the outermost template so includes aren't double counted
+        if not stats["template_stack"]:
+            stats["template_time"] += elapsed
+        self.observe("grilgo_template_render_seconds", {"template": template.name or "string"}, elapsed)
+
+    # --- SQLAlchemy engine hooks (wired up in app.py) --------------------
+
+    def before_cursor_execute(self, conn):
+        if self.enabled:
+            conn.info.setdefault("metrics_query_start", []).append(time.perf_counter())
+
+    def after_cursor_execute(self, conn):
+        if not self.enabled:
+            return
+        starts = conn.info.get("metrics_query_start")
+        if not starts:
+            return
+        elapsed = time.perf_counter() - starts.pop()
+        stats = self._request_stats()
+        if stats is not None:
+            stats["sql_count"] += 1
+            stats["sql_time"] += elapsed
+        else:
+            # Queries issued outside a request (CLI, background threads)
+            self.inc("grilgo_sql_queries_total", {"endpoint": "none"})
+            self.inc("grilgo_sql_duration_seconds_total", {"endpoint": "none"}, elapsed)
+
+    def handle_error(self, conn):
+        # A failed statement never reaches after_cursor_execute; drop its start
+        # time so it doesn't linger on the pooled connection
+        if conn is None:
+            return
+        starts = conn.info.get("metrics_query_start")
+        if starts:
+            starts.pop()
+
+    # --- optimizer -------------------------------------------------------
+
+    @contextmanager
+    def phase(self, name):
+        """Time one optimizer phase: fetch, build, solve or write_back."""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.observe("grilgo_optimizer_phase_seconds", {"phase": name}, elapsed)
+            stats = self._request_stats()
+            if stats is not None:
+                stats["phases"][name] = stats["phases"].get(name, 0.0) + elapsed
+
+    # --- export ----------------------------------------------------------
+
+    def export(self):
+        return Response(self.render(), mimetype="text/plain; version=0.0.4")
+
+    def render(self):
+        """Render every metric in the Prometheus text exposition format."""
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+            counters = sorted(self._counters.items())
+
+        lines = []
+        seen = set()
+        for (name, labels), value in counters:
+            if name not in seen:
+                lines.append(f"# TYPE {name} counter")
+                seen.add(name)
+            lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+
+        for (name, labels), hist in histograms:
+            if name not in seen:
+                lines.append(f"# TYPE {name} histogram")
+                seen.add(name)
+            cumulative = 0
+            for upper, count in zip(hist.buckets, hist.counts):
+                cumulative += count
+                bucket_labels = labels + (("le", _format_value(upper)),)
+                lines.append(f"{name}_bucket{_format_labels(bucket_labels)} {cumulative}")
+            lines.append(f"{name}_bucket{_format_labels(labels + (('le', '+Inf'),))} {hist.count}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(hist.total)}")
+            lines.append(f"{name}_count{_format_labels(labels)} {hist.count}")
+
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    pairs = ",".join(f'{key}="{_escape(value)}"' for key, value in labels)
+    return "{" + pairs + "}"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value):
+    if isinstance(value, float):
+        return repr(value)
+    return str(value)
+
+
+metrics = Metrics()
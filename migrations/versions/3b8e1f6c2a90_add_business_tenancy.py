@@ -0,0 +1,97 @@
+"""add business tenancy
+
+Revision ID: 3b8e1f6c2a90
+Revises: 07594d4c7f22
+Create Date: 2026-10-19 10:12:44.318204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3b8e1f6c2a90'
+down_revision = '07594d4c7f22'
+branch_labels = None
+depends_on = None
+
+
+def _sqlite_foreign_keys(enabled):
+    # Batch mode recreates tables, which SQLite refuses while other tables reference them
+    bind = op.get_bind()
+    if bind.dialect.name != 'sqlite':
+        return
+    # SQLite silently ignores this pragma inside a transaction, so end any open one
+    driver_connection = bind.connection.driver_connection
+    if driver_connection.in_transaction:
+        driver_connection.commit()
+    op.execute(f"PRAGMA foreign_keys={'ON' if enabled else 'OFF'}")
+    if bind.exec_driver_sql("PRAGMA foreign_keys").scalar() != int(enabled):
+        raise RuntimeError("Could not change SQLite foreign_keys outside a transaction")
+
+
+def upgrade():
+    _sqlite_foreign_keys(False)
+    op.create_table('business',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    # Existing rows all belong to the original single business
+    op.execute("INSERT INTO business (id, name) VALUES (1, 'Default')")
+
+    with op.batch_alter_table('worker', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('business_id', sa.Integer(), nullable=False, server_default='1'))
+        batch_op.create_foreign_key('fk_worker_business_id', 'business', ['business_id'], ['id'], ondelete='CASCADE')
+        batch_op.create_index('ix_worker_business_id', ['business_id', 'id'], unique=False)
+    with op.batch_alter_table('worker', schema=None) as batch_op:
+        batch_op.alter_column('business_id', server_default=None)
+
+    with op.batch_alter_table('shift', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('business_id', sa.Integer(), nullable=False, server_default='1'))
+        batch_op.create_foreign_key('fk_shift_business_id', 'business', ['business_id'], ['id'], ondelete='CASCADE')
+        batch_op.create_index('ix_shift_business_date', ['business_id', 'date'], unique=False)
+    with op.batch_alter_table('shift', schema=None) as batch_op:
+        batch_op.alter_column('business_id', server_default=None)
+
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('business_id', sa.Integer(), nullable=False, server_default='1'))
+        batch_op.create_foreign_key('fk_user_business_id', 'business', ['business_id'], ['id'], ondelete='CASCADE')
+        batch_op.create_index('ix_user_business_role', ['business_id', 'role'], unique=False)
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.alter_column('business_id', server_default=None)
+
+    with op.batch_alter_table('shift_template', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('business_id', sa.Integer(), nullable=False, server_default='1'))
+        batch_op.create_foreign_key('fk_shift_template_business_id', 'business', ['business_id'], ['id'], ondelete='CASCADE')
+        batch_op.create_index('ix_shift_template_business_id', ['business_id'], unique=False)
+    with op.batch_alter_table('shift_template', schema=None) as batch_op:
+        batch_op.alter_column('business_id', server_default=None)
+
+    _sqlite_foreign_keys(True)
+
+
+def downgrade():
+    _sqlite_foreign_keys(False)
+    with op.batch_alter_table('shift_template', schema=None) as batch_op:
+        batch_op.drop_index('ix_shift_template_business_id')
+        batch_op.drop_constraint('fk_shift_template_business_id', type_='foreignkey')
+        batch_op.drop_column('business_id')
+
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_index('ix_user_business_role')
+        batch_op.drop_constraint('fk_user_business_id', type_='foreignkey')
+        batch_op.drop_column('business_id')
+
+    with op.batch_alter_table('shift', schema=None) as batch_op:
+        batch_op.drop_index('ix_shift_business_date')
+        batch_op.drop_constraint('fk_shift_business_id', type_='foreignkey')
+        batch_op.drop_column('business_id')
+
+    with op.batch_alter_table('worker', schema=None) as batch_op:
+        batch_op.drop_index('ix_worker_business_id')
+        batch_op.drop_constraint('fk_worker_business_id', type_='foreignkey')
+        batch_op.drop_column('business_id')
+
+    op.drop_table('business')
+    _sqlite_foreign_keys(True)
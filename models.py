@@ -1,12 +1,98 @@
 from flask_sqlalchemy import SQLAlchemy
 from werkzeug.security import generate_password_hash, check_password_hash
 from flask_login import UserMixin
+from sqlalchemy import event
+from sqlalchemy.orm import Session, declared_attr, with_loader_criteria
+from contextlib import contextmanager
+from contextvars import ContextVar
 import json
+from datetime import datetime
 
 
 db = SQLAlchemy()
 
-class Worker(db.Model):
+# Business whose rows the current request (or optimizer run) may see
+_current_business_id = ContextVar("current_business_id", default=None)
+
+
+def get_current_business_id():
+    return _current_business_id.get()
+
+
+def set_current_business_id(business_id):
+    """Scope this context to one business; returns a token for reset_current_business_id."""
+    return _current_business_id.set(business_id)
+
+
+def reset_current_business_id(token):
+    _current_business_id.reset(token)
+
+
+@contextmanager
+def business_scope(business_id):
+    token = set_current_business_id(business_id)
+    try:
+        yield
+    finally:
+        reset_current_business_id(token)
+
+
+def _default_business_id():
+    business_id = get_current_business_id()
+    if business_id is None:
+        raise RuntimeError("No business in scope; wrap inserts in business_scope().")
+    return business_id
+
+
+class Business(db.Model):
+    """One tenant: a single location of a small business."""
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+
+
+class TenantScoped:
+    """Rows owned by a business. Queries only see the business in scope."""
+
+    @declared_attr
+    def business_id(cls):
+        return db.Column(
+            db.Integer,
+            db.ForeignKey('business.id', ondelete="CASCADE"),
+            nullable=False,
+            default=_default_business_id,
+        )
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _scope_to_business(execute_state):
+    if not (execute_state.is_select or execute_state.is_update or execute_state.is_delete):
+        return
+    # Lazy/column loads inherit the criteria from the query that loaded the parent
+    if execute_state.is_column_load or execute_state.is_relationship_load:
+        return
+    if execute_state.execution_options.get("all_businesses", False):
+        return
+    business_id = get_current_business_id()
+    if business_id is None:
+        # Fail closed: an unscoped query would otherwise see every tenant's rows
+        if any(issubclass(mapper.class_, TenantScoped) for mapper in execute_state.all_mappers):
+            raise RuntimeError(
+                "No business in scope; wrap queries in business_scope() "
+                "or pass execution_options(all_businesses=True)."
+            )
+        return
+    execute_state.statement = execute_state.statement.options(
+        with_loader_criteria(
+            TenantScoped,
+            lambda cls: cls.business_id == business_id,
+            include_aliases=True,
+        )
+    )
+
+
+class Worker(TenantScoped, db.Model):
+    __table_args__ = (db.Index('ix_worker_business_id', 'business_id', 'id'),)
+
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(50), nullable=False)
 
@@ -21,6 +107,9 @@ class Worker(db.Model):
     # Example: "Mon:9-17,Tue:12-20,Wed:off,..."
     unavailable_days = db.Column(db.Text, default='[]')  # JSON string like {"2025-08-05": true, "2025-08-13": true}
 
+    # Where schedule notifications are emailed; optional
+    email = db.Column(db.String(120))
+
     # specialization flags
     is_cart_staff = db.Column(db.Boolean, default=False)
     is_turn_grill_staff = db.Column(db.Boolean, default=False)
@@ -31,7 +120,9 @@ class Worker(db.Model):
     def set_unavailable_dates(self, dates_list):
         self.unavailable_dates = json.dumps(dates_list)
 
-class Shift(db.Model):
+class Shift(TenantScoped, db.Model):
+    __table_args__ = (db.Index('ix_shift_business_date', 'business_id', 'date'),)
+
     id = db.Column(db.Integer, primary_key=True)
     date = db.Column(db.Date, nullable=False)
     start_time = db.Column(db.Time, nullable=False)
@@ -43,7 +134,9 @@ class Shift(db.Model):
 
     worker_id = db.Column(db.Integer, db.ForeignKey('worker.id', ondelete="CASCADE"), nullable=True)
 
-class User(db.Model, UserMixin):
+class User(TenantScoped, db.Model, UserMixin):
+    __table_args__ = (db.Index('ix_user_business_role', 'business_id', 'role'),)
+
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), unique=True, nullable=False)
     password_hash = db.Column(db.String(128), nullable=False)
@@ -57,7 +150,9 @@ class User(db.Model, UserMixin):
     def check_password(self, password):
         return check_password_hash(self.password_hash, password)
     
-class ShiftTemplate(db.Model):
+class ShiftTemplate(TenantScoped, db.Model):
+    __table_args__ = (db.Index('ix_shift_template_business_id', 'business_id'),)
+
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(50), nullable=False)   # e.g. "Opener"
     start_time = db.Column(db.Time, nullable=False)
@@ -65,9 +160,69 @@ class ShiftTemplate(db.Model):
     role_type = db.Column(db.String(20), default="normal")  
     # normal, cart, turn_grill
 
+class ScheduleSnapshot(TenantScoped, db.Model):
+    """Worker assignments for a set of shifts at one point in time."""
+    __table_args__ = (db.Index('ix_schedule_snapshot_business_first_day', 'business_id', 'first_day'),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    reason = db.Column(db.String(20), nullable=False)  # reset, generate, restore
+    first_day = db.Column(db.Date, nullable=False)
+    last_day = db.Column(db.Date, nullable=False)
+    shift_count = db.Column(db.Integer, nullable=False, default=0)
+
+    # Compact JSON like {"12": 3, "13": null} mapping shift id -> worker id
+    assignments = db.Column(db.Text, nullable=False, default='{}')
+
+    def get_assignments(self):
+        return {int(shift_id): worker_id for shift_id, worker_id in json.loads(self.assignments or "{}").items()}
+
+    def set_assignments(self, assignments):
+        self.assignments = json.dumps(assignments, separators=(",", ":"))
+        self.shift_count = len(assignments)
+
+class Notification(TenantScoped, db.Model):
+    """In-app inbox message for a worker, optionally also emailed."""
+    __table_args__ = (db.Index('ix_notification_business_worker', 'business_id', 'worker_id', 'created_at'),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    worker_id = db.Column(db.Integer, db.ForeignKey('worker.id', ondelete="CASCADE"), nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    subject = db.Column(db.String(200), nullable=False)
+    body = db.Column(db.Text, nullable=False)
+    read_at = db.Column(db.DateTime)
+
+    # pending, sent, failed, or none (worker has no email)
+    email_status = db.Column(db.String(10), nullable=False, default="none")
+    email_attempts = db.Column(db.Integer, nullable=False, default=0)
+
+class SolverJob(TenantScoped, db.Model):
+    """One background optimizer run; its progress events are readable from any process."""
+    __table_args__ = (db.Index('ix_solver_job_business_month', 'business_id', 'year', 'month'),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    year = db.Column(db.Integer, nullable=False)
+    month = db.Column(db.Integer, nullable=False)
+    status = db.Column(db.String(10), nullable=False, default="running")  # running, finished, failed
+    # "business:year:month" while running, NULL after; the unique index allows one run per month
+    active_key = db.Column(db.String(40), unique=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)  # heartbeat
+    finished_at = db.Column(db.DateTime)
+
+class SolverJobEvent(db.Model):
+    """A Server-Sent Event published by a SolverJob; seq is its SSE id."""
+    __table_args__ = (db.UniqueConstraint('job_id', 'seq', name='uq_solver_job_event_job_seq'),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    job_id = db.Column(db.Integer, db.ForeignKey('solver_job.id', ondelete="CASCADE"), nullable=False)
+    seq = db.Column(db.Integer, nullable=False)
+    event = db.Column(db.String(20), nullable=False)
+    data = db.Column(db.Text, nullable=False)
+
 import secrets
 import string
 
 def generate_random_password(length=10):
     characters = string.ascii_letters + string.digits
-    return ''.join(secrets.choice(characters) for _ in range(length))
\ No newline at end of file
+    return ''.join(secrets.choice(characters) for _ in range(length))
@@ -0,0 +1,299 @@
+"""
+Schedule publish notifications: an in-app inbox plus email.
+
+Emails go out from a background thread in batches (one SMTP connection per
+batch) and failed sends are retried with backoff, so publishing never waits
+on the mail server. For local testing run a debug server such as
+``python -m aiosmtpd -n -l localhost:1025`` and leave MAIL_SERVER/MAIL_PORT
+at their defaults.
+"""
+import heapq
+import os
+import queue
+import smtplib
+import threading
+import time
+from collections import defaultdict
+from email.message import EmailMessage
+
+from sqlalchemy import update
+from sqlalchemy.exc import OperationalError, ProgrammingError
+
+from helpers import get_month_range
+from models import db, Notification, Shift, Worker, ScheduleSnapshot
+
+
+MAIL_DEFAULTS = {
+    "MAIL_ENABLED": True,  # start delivery (and resend what a previous run left) at startup
+    "MAIL_SERVER": "localhost",
+    "MAIL_PORT": 1025,
+    "MAIL_USE_TLS": False,
+    "MAIL_USERNAME": None,
+    "MAIL_PASSWORD": None,
+    "MAIL_DEFAULT_SENDER": "schedule@localhost",
+    "MAIL_BATCH_SIZE": 50,
+    "MAIL_MAX_ATTEMPTS": 5,
+    "MAIL_RETRY_SECONDS": 5,  # doubled after each failed attempt
+}
+
+
+class MailQueue:
+    """
+    Background, batched email delivery for Notification rows.
+
+    Every send attempt is claimed first with a conditional UPDATE on
+    email_attempts, so when several processes run a queue each attempt is
+    made by exactly one of them.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self._queue = queue.Queue()
+        self._retries = []  # heap of (due time, notification id); mail thread only
+        self._scheduled = set()  # ids waiting in _queue or _retries
+        self._thread = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        for key, default in MAIL_DEFAULTS.items():
+            value = os.environ.get(key)
+            if value is None:
+                app.config.setdefault(key, default)
+            elif isinstance(default, bool):
+                app.config[key] = value.lower() in ("1", "true", "yes")
+            elif isinstance(default, int):
+                app.config[key] = int(value)
+            else:
+                app.config[key] = value
+        self.app = app
+        if app.config["MAIL_ENABLED"]:
+            self._start()
+
+    def enqueue(self, notification_ids):
+        if self.app.config["MAIL_ENABLED"]:
+            self._start()
+        with self._lock:
+            for notification_id in notification_ids:
+                if notification_id not in self._scheduled:
+                    self._scheduled.add(notification_id)
+                    self._queue.put(notification_id)
+
+    def _start(self):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="mail-queue", daemon=True)
+            self._thread.start()
+
+    def _recover(self):
+        """Queue anything a previous process left unsent. Runs once per thread start."""
+        with self.app.app_context():
+            try:
+                pending = db.session.query(Notification.id).execution_options(all_businesses=True).filter(
+                    Notification.email_status == "pending"
+                ).all()
+            except (OperationalError, ProgrammingError) as e:
+                # e.g. `flask db upgrade` on a database that has no notification table yet
+                self.app.logger.warning("Mail recovery scan skipped: %s", e.orig)
+                return
+            self.enqueue([notification_id for (notification_id,) in pending])
+
+    def _next_batch(self):
+        """Block until something is due, then take up to MAIL_BATCH_SIZE ids."""
+        batch_size = self.app.config["MAIL_BATCH_SIZE"]
+        batch = []
+        while not batch:
+            now = time.time()
+            while self._retries and self._retries[0][0] <= now and len(batch) < batch_size:
+                batch.append(heapq.heappop(self._retries)[1])
+            if batch:
+                break
+            timeout = self._retries[0][0] - now if self._retries else None
+            try:
+                batch.append(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                continue
+
+        while len(batch) < batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        with self._lock:
+            self._scheduled.difference_update(batch)
+        return list(dict.fromkeys(batch))
+
+    def _run(self):
+        try:
+            self._recover()
+        except Exception:
+            self.app.logger.exception("Mail recovery scan failed")
+        while True:
+            batch = self._next_batch()
+            try:
+                with self.app.app_context():
+                    self._send_batch(batch)
+            except Exception:
+                self.app.logger.exception("Mail batch failed")
+
+    def _claim(self, notification_ids):
+        """Take one send attempt on each pending notification; returns the rows this process won."""
+        rows = db.session.query(
+            Notification.id, Notification.email_attempts, Notification.subject, Notification.body, Worker.email
+        ).execution_options(all_businesses=True).join(
+            Worker, Worker.id == Notification.worker_id
+        ).filter(
+            Notification.id.in_(notification_ids),
+            Notification.email_status == "pending"
+        ).all()
+
+        table = Notification.__table__
+        claimed = []
+        for row in rows:
+            result = db.session.execute(
+                update(table)
+                .where(table.c.id == row.id, table.c.email_status == "pending",
+                       table.c.email_attempts == row.email_attempts)
+                .values(email_attempts=row.email_attempts + 1)
+            )
+            if result.rowcount == 1:
+                claimed.append(row)
+        # Commit before sending so no other process can claim the same attempt
+        db.session.commit()
+        return claimed
+
+    def _send_batch(self, notification_ids):
+        config = self.app.config
+        rows = self._claim(notification_ids)
+        if not rows:
+            return
+
+        try:
+            smtp = smtplib.SMTP(config["MAIL_SERVER"], config["MAIL_PORT"], timeout=10)
+            if config["MAIL_USE_TLS"]:
+                smtp.starttls()
+            if config["MAIL_USERNAME"]:
+                smtp.login(config["MAIL_USERNAME"], config["MAIL_PASSWORD"])
+        except (smtplib.SMTPException, OSError):
+            self._reschedule(rows)
+            db.session.commit()
+            return
+
+        sent, retry, failed = [], [], []
+        try:
+            for row in rows:
+                try:
+                    message = EmailMessage()
+                    message["From"] = config["MAIL_DEFAULT_SENDER"]
+                    message["To"] = row.email
+                    message["Subject"] = row.subject
+                    message.set_content(row.body)
+                    smtp.send_message(message)
+                    sent.append(row.id)
+                except (smtplib.SMTPException, OSError):
+                    retry.append(row)
+                except Exception:
+                    # A malformed message won't send on a retry either
+                    self.app.logger.exception("Could not email notification %s", row.id)
+                    failed.append(row.id)
+        finally:
+            try:
+                smtp.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._set_status(sent, "sent")
+            self._set_status(failed, "failed")
+            self._reschedule(retry)
+            db.session.commit()
+
+    def _set_status(self, notification_ids, status):
+        if notification_ids:
+            table = Notification.__table__
+            db.session.execute(update(table).where(table.c.id.in_(notification_ids)).values(email_status=status))
+
+    def _reschedule(self, rows):
+        """Retry claimed rows later with backoff, or give up after MAIL_MAX_ATTEMPTS."""
+        max_attempts = self.app.config["MAIL_MAX_ATTEMPTS"]
+        gave_up = []
+        for row in rows:
+            attempts = row.email_attempts + 1  # including the attempt just claimed
+            if attempts >= max_attempts:
+                gave_up.append(row.id)
+                continue
+            delay = self.app.config["MAIL_RETRY_SECONDS"] * 2 ** (attempts - 1)
+            heapq.heappush(self._retries, (time.time() + delay, row.id))
+            with self._lock:
+                self._scheduled.add(row.id)
+        self._set_status(gave_up, "failed")
+
+
+mail_queue = MailQueue()
+
+
+def _describe(shift):
+    return (f"{shift.date.strftime('%a %b %d')} "
+            f"{shift.start_time.strftime('%H:%M')}–{shift.end_time.strftime('%H:%M')} ({shift.role_type})")
+
+
+def publish_schedule(year, month):
+    """
+    Notify every worker whose shifts changed since the month was last published.
+    Returns the number of workers notified.
+    """
+    first_day, last_day = get_month_range(year, month)
+    previous = ScheduleSnapshot.query.filter_by(
+        reason="publish", first_day=first_day, last_day=last_day
+    ).order_by(ScheduleSnapshot.id.desc()).first()
+    before = previous.get_assignments() if previous else {}
+
+    # One pass over the month's assignments builds every worker's diff
+    added = defaultdict(list)
+    removed = defaultdict(list)
+    current = {}
+    rows = db.session.query(
+        Shift.id, Shift.worker_id, Shift.date, Shift.start_time, Shift.end_time, Shift.role_type
+    ).filter(Shift.date.between(first_day, last_day)).order_by(Shift.date, Shift.start_time)
+    for row in rows:
+        current[row.id] = row.worker_id
+        old = before.get(row.id)
+        if row.worker_id == old:
+            continue
+        if row.worker_id is not None:
+            added[row.worker_id].append(row)
+        if old is not None:
+            removed[old].append(row)
+
+    dropped = defaultdict(int)
+    for shift_id in before.keys() - current.keys():
+        if before[shift_id] is not None:
+            dropped[before[shift_id]] += 1
+
+    snapshot = ScheduleSnapshot(reason="publish", first_day=first_day, last_day=last_day)
+    snapshot.set_assignments(current)
+    db.session.add(snapshot)
+
+    affected = set(added) | set(removed) | set(dropped)
+    workers = Worker.query.filter(Worker.id.in_(affected)).all() if affected else []
+    month_name = first_day.strftime("%B %Y")
+    notifications = []
+    for worker in workers:
+        lines = [f"Hi {worker.name},", ""]
+        lines += [f"New: {_describe(s)}" for s in added[worker.id]]
+        lines += [f"Removed: {_describe(s)}" for s in removed[worker.id]]
+        if dropped[worker.id]:
+            lines.append(f"Removed: {dropped[worker.id]} shift(s) that are no longer on the schedule")
+        verb = "updated" if previous else "published"
+        notifications.append(Notification(
+            worker_id=worker.id,
+            subject=f"Your {month_name} schedule was {verb}",
+            body="\n".join(lines),
+            email_status="pending" if worker.email else "none",
+        ))
+
+    db.session.add_all(notifications)
+    db.session.commit()
+
+    mail_queue.enqueue([n.id for n in notifications if n.email_status == "pending"])
+    return len(notifications)
@@ -0,0 +1,166 @@
+"""
+What-if scheduling: solve modified copies of a month without touching the shift table.
+
+A scenario is a dict of overrides applied to the month's inputs:
+
+    {
+        "name": "hire a cart person",
+        "add_workers": [{"name": "New hire", "is_cart_staff": true}],
+        "remove_workers": [12],
+        "closed_dates": ["2025-07-04"],
+        "max_shifts_per_day": 2
+    }
+
+Every scenario is planned from scratch over all of the month's shifts, and
+shifts may go unfilled, so coverage is comparable across scenarios.
+"""
+import math
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta
+
+from pulp import LpStatus
+
+from ai_scheduler import load_month_problem, build_model, solve_model, extract_assignments
+
+
+SCENARIO_TIME_LIMIT = 60  # seconds per scenario solve
+MAX_SCENARIOS = 16
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+class ScenarioError(ValueError):
+    """A scenario's overrides are malformed."""
+
+
+class ScenarioPoolError(RuntimeError):
+    """A solver process died; the pool has been reset for the next request."""
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn, not fork: the web process has live threads and DB connections
+            _pool = ProcessPoolExecutor(
+                max_workers=int(os.environ.get("SCENARIO_WORKERS", os.cpu_count() or 2)),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def apply_overrides(problem, scenario):
+    """Return a modified copy of problem; the original is left untouched."""
+    if not isinstance(scenario, dict):
+        raise ScenarioError("Each scenario must be an object of overrides")
+    workers = [dict(w) for w in problem["workers"]]
+    shifts = list(problem["shifts"])
+
+    try:
+        removed = {int(worker_id) for worker_id in scenario.get("remove_workers", [])}
+        workers = [w for w in workers if w["id"] not in removed]
+
+        # Hypothetical hires get negative ids so they can't clash with real workers
+        for i, spec in enumerate(scenario.get("add_workers", []), start=1):
+            workers.append({
+                "id": -i,
+                "name": spec.get("name", f"New worker {i}"),
+                "is_cart_staff": bool(spec.get("is_cart_staff", False)),
+                "is_turn_grill_staff": bool(spec.get("is_turn_grill_staff", False)),
+                "unavailable": set(spec.get("unavailable", [])),
+            })
+
+        closed = {datetime.strptime(d, "%Y-%m-%d").date() for d in scenario.get("closed_dates", [])}
+        shifts = [s for s in shifts if s["date"] not in closed]
+
+        max_per_day = int(scenario.get("max_shifts_per_day", problem["max_shifts_per_day"]))
+    except (TypeError, ValueError, AttributeError) as e:
+        raise ScenarioError(f"Invalid scenario {scenario.get('name', '')!r}: {e}") from e
+
+    if max_per_day < 1:
+        raise ScenarioError("max_shifts_per_day must be at least 1")
+
+    return {"workers": workers, "shifts": shifts, "max_shifts_per_day": max_per_day}
+
+
+def _shift_hours(shift):
+    start = datetime.combine(shift["date"], shift["start_time"])
+    end = datetime.combine(shift["date"], shift["end_time"])
+    if end <= start:
+        end += timedelta(days=1)
+    return (end - start).total_seconds() / 3600
+
+
+def solve_scenario(problem, scenario, time_limit=SCENARIO_TIME_LIMIT):
+    """Solve one scenario and summarize it. Runs in a pool process."""
+    start = time.perf_counter()
+    modified = apply_overrides(problem, scenario)
+    prob, x = build_model(modified, allow_uncovered=True)
+    build_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    solve_model(prob, time_limit=time_limit)
+    solve_seconds = time.perf_counter() - start
+
+    assignments = extract_assignments(x)
+    shifts = {s["id"]: s for s in modified["shifts"]}
+    hours = {w["id"]: 0.0 for w in modified["workers"]}
+    for shift_id, worker_id in assignments.items():
+        hours[worker_id] += _shift_hours(shifts[shift_id])
+
+    names = {w["id"]: w["name"] for w in modified["workers"]}
+    worked = list(hours.values())
+    return {
+        "name": scenario.get("name", ""),
+        "status": LpStatus[prob.status],
+        "shifts": len(shifts),
+        "assigned": len(assignments),
+        "coverage": round(len(assignments) / len(shifts), 4) if shifts else 1.0,
+        "uncovered_shift_ids": sorted(set(shifts) - set(assignments)),
+        # Keyed by worker id (negative for hypothetical hires); names needn't be unique
+        "hours_per_worker": {w: {"name": names[w], "hours": round(h, 2)} for w, h in hours.items()},
+        "min_hours": round(min(worked), 2) if worked else 0,
+        "max_hours": round(max(worked), 2) if worked else 0,
+        "mean_hours": round(sum(worked) / len(worked), 2) if worked else 0,
+        "variables": len(x),
+        "constraints": len(prob.constraints),
+        "build_seconds": round(build_seconds, 3),
+        "solve_seconds": round(solve_seconds, 3),
+    }
+
+
+def _reset_pool(broken):
+    global _pool
+    with _pool_lock:
+        # Another request may already have replaced it
+        if _pool is broken:
+            _pool = None
+    broken.shutdown(wait=False, cancel_futures=True)
+
+
+def run_scenarios(year, month, scenarios, time_limit=SCENARIO_TIME_LIMIT):
+    """
+    Solve every scenario for the business in scope in parallel.
+    The month's inputs are read once; nothing is written back.
+    """
+    if not (isinstance(time_limit, (int, float)) and math.isfinite(time_limit) and time_limit > 0):
+        raise ScenarioError("time_limit must be a positive number of seconds")
+
+    problem = load_month_problem(year, month, unassigned_only=False)
+    for scenario in scenarios:
+        # Fail fast on bad input instead of inside a pool process
+        apply_overrides(problem, scenario)
+
+    pool = _get_pool()
+    try:
+        futures = [pool.submit(solve_scenario, problem, scenario, time_limit) for scenario in scenarios]
+        return [future.result() for future in futures]
+    except BrokenProcessPool as e:
+        _reset_pool(pool)
+        raise ScenarioPoolError("A scenario solver process stopped unexpectedly. Try again.") from e
@@ -0,0 +1,111 @@
+from models import db, Shift, Worker, ScheduleSnapshot
+
+
+def _shift_filter(first_day, last_day, role_type=None, worker_id=None):
+    criteria = [Shift.date.between(first_day, last_day)]
+    if role_type:
+        criteria.append(Shift.role_type == role_type)
+    if worker_id:
+        criteria.append(Shift.worker_id == worker_id)
+    return criteria
+
+
+def current_assignments(first_day, last_day, role_type=None, worker_id=None):
+    """{shift_id: worker_id} for matching shifts, read without loading Shift objects."""
+    rows = db.session.query(Shift.id, Shift.worker_id).filter(
+        *_shift_filter(first_day, last_day, role_type, worker_id)
+    )
+    return {shift_id: assigned for shift_id, assigned in rows}
+
+
+def take_snapshot(first_day, last_day, reason, role_type=None, worker_id=None):
+    """Record the current assignment of matching shifts. Caller commits."""
+    snapshot = ScheduleSnapshot(reason=reason, first_day=first_day, last_day=last_day)
+    snapshot.set_assignments(current_assignments(first_day, last_day, role_type, worker_id))
+    db.session.add(snapshot)
+    return snapshot
+
+
+def unassign_shifts(first_day, last_day, role_type=None, worker_id=None):
+    """
+    Snapshot then unassign matching shifts with a single UPDATE.
+    Returns (snapshot, number of shifts unassigned).
+    """
+    snapshot = take_snapshot(first_day, last_day, "reset", role_type, worker_id)
+    count = Shift.query.filter(
+        *_shift_filter(first_day, last_day, role_type, worker_id),
+        Shift.worker_id.isnot(None),
+    ).update({Shift.worker_id: None}, synchronize_session=False)
+    db.session.commit()
+    return snapshot, count
+
+
+def restore_snapshot(snapshot):
+    """
+    Put back the assignments recorded in a snapshot, one UPDATE per worker.
+    The state being replaced is snapshotted first so a restore can be undone.
+    Shifts deleted since the snapshot are skipped, as are shifts whose recorded
+    worker has since been deleted. Returns (undo snapshot, changed count, skipped count).
+    """
+    recorded = snapshot.get_assignments()
+    current = db.session.query(Shift.id, Shift.worker_id).filter(Shift.id.in_(list(recorded)))
+    current = {shift_id: assigned for shift_id, assigned in current}
+    recorded_workers = {assigned for assigned in recorded.values() if assigned is not None}
+    existing_workers = {
+        worker_id for (worker_id,) in
+        db.session.query(Worker.id).filter(Worker.id.in_(recorded_workers))
+    } if recorded_workers else set()
+
+    undo = ScheduleSnapshot(reason="restore", first_day=snapshot.first_day, last_day=snapshot.last_day)
+    undo.set_assignments(current)
+    db.session.add(undo)
+
+    by_worker = {}
+    skipped = 0
+    for shift_id, assigned in recorded.items():
+        if shift_id not in current or current[shift_id] == assigned:
+            continue
+        if assigned is not None and assigned not in existing_workers:
+            skipped += 1
+            continue
+        by_worker.setdefault(assigned, []).append(shift_id)
+
+    changed = 0
+    for assigned, shift_ids in by_worker.items():
+        changed += Shift.query.filter(Shift.id.in_(shift_ids)).update(
+            {Shift.worker_id: assigned}, synchronize_session=False
+        )
+    db.session.commit()
+    return undo, changed, skipped
+
+
+def diff_assignments(before, after):
+    """[(shift_id, old worker id, new worker id)] for every shift whose assignment differs."""
+    return [
+        (shift_id, before.get(shift_id), after.get(shift_id))
+        for shift_id in sorted(before.keys() | after.keys())
+        if before.get(shift_id) != after.get(shift_id)
+    ]
+
+
+def describe_diff(changes):
+    """Attach Shift rows and worker names to diff_assignments output for display."""
+    shift_ids = [shift_id for shift_id, _, _ in changes]
+    shifts = {s.id: s for s in Shift.query.filter(Shift.id.in_(shift_ids)).all()} if shift_ids else {}
+    worker_ids = {w for _, old, new in changes for w in (old, new) if w is not None}
+    names = dict(
+        db.session.query(Worker.id, Worker.name).filter(Worker.id.in_(worker_ids))
+    ) if worker_ids else {}
+
+    rows = [
+        {
+            "shift_id": shift_id,
+            "shift": shifts.get(shift_id),
+            "before": names.get(old, "Unassigned" if old is None else f"#{old}"),
+            "after": names.get(new, "Unassigned" if new is None else f"#{new}"),
+        }
+        for shift_id, old, new in changes
+    ]
+    rows.sort(key=lambda r: (r["shift"] is None, r["shift"].date if r["shift"] else None,
+                             r["shift"].start_time if r["shift"] else None))
+    return rows
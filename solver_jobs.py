@@ -0,0 +1,204 @@
+"""
+Background optimizer runs with progress streamed over Server-Sent Events.
+
+A run's events are written to the solver_job_event table as they happen, so
+any gunicorn process can serve a job's page and event stream, and a browser
+that reconnects resumes from Last-Event-ID wherever its request lands. The
+solve runs on a small thread pool in the process that started it, and at
+most MAX_CONCURRENT_SOLVES run at once across the deployment. An event
+stream only polls the table, so it costs one cheap gthread thread, never a
+sync worker.
+"""
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+
+from ai_scheduler import build_monthly_optimizer, get_month_range
+from models import db, business_scope, SolverJob, SolverJobEvent
+from schedule_history import take_snapshot
+
+
+# CBC is CPU bound, so more solves than cores only slows every one of them down
+MAX_CONCURRENT_SOLVES = int(os.environ.get("MAX_CONCURRENT_SOLVES", 2))
+
+# A running job that hasn't been heard from this long died with its process
+JOB_STALE_SECONDS = 120
+HEARTBEAT_SECONDS = 30
+
+# Finished jobs are kept this long so late or reconnecting clients still get the result
+JOB_RETENTION_SECONDS = 24 * 3600
+
+POLL_SECONDS = 0.5
+KEEPALIVE_SECONDS = 15
+
+_executor = ThreadPoolExecutor(max_workers=MAX_CONCURRENT_SOLVES, thread_name_prefix="solver")
+
+_jobs = SolverJob.__table__
+_events = SolverJobEvent.__table__
+
+
+class SolverBusyError(Exception):
+    """Too many optimizer runs are in progress; try again shortly."""
+
+
+class _Publisher:
+    """Writes one running job's events; used from the solver's threads only."""
+
+    def __init__(self, engine, job_id):
+        self.engine = engine
+        self.job_id = job_id
+        self.seq = 0
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def publish(self, event, data, **job_values):
+        data = dict(data, elapsed=data.get("elapsed", round(time.perf_counter() - self.started, 2)))
+        with self._lock, self.engine.begin() as conn:
+            self.seq += 1
+            conn.execute(insert(_events).values(job_id=self.job_id, seq=self.seq, event=event, data=json.dumps(data)))
+            conn.execute(update(_jobs).where(_jobs.c.id == self.job_id).values(updated_at=datetime.utcnow(), **job_values))
+
+    def finish(self, event, data, status):
+        self.publish(event, data, status=status, finished_at=datetime.utcnow(), active_key=None)
+
+    def heartbeat(self):
+        with self.engine.begin() as conn:
+            conn.execute(update(_jobs).where(_jobs.c.id == self.job_id).values(updated_at=datetime.utcnow()))
+
+
+def _run(app, job_id, business_id, year, month):
+    with app.app_context(), business_scope(business_id):
+        publisher = _Publisher(db.engine, job_id)
+        # Building a big model or writing it back can go a while without events
+        stop = threading.Event()
+
+        def beat():
+            while not stop.wait(HEARTBEAT_SECONDS):
+                publisher.heartbeat()
+
+        threading.Thread(target=beat, daemon=True).start()
+        try:
+            summary = build_monthly_optimizer(year, month, progress=publisher.publish)
+            first_day, last_day = get_month_range(year, month)
+            take_snapshot(first_day, last_day, "generate")
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            publisher.finish("error", {"message": str(e)}, "failed")
+            return
+        finally:
+            stop.set()
+        publisher.finish("result", summary, "finished")
+
+
+def expire_stale_jobs(engine):
+    """Fail running jobs whose process stopped sending heartbeats, in every business."""
+    cutoff = datetime.utcnow() - timedelta(seconds=JOB_STALE_SECONDS)
+    with engine.begin() as conn:
+        stale = conn.execute(
+            select(_jobs.c.id).where(_jobs.c.status == "running", _jobs.c.updated_at < cutoff)
+        ).scalars().all()
+        for job_id in stale:
+            claimed = conn.execute(
+                update(_jobs)
+                .where(_jobs.c.id == job_id, _jobs.c.status == "running", _jobs.c.updated_at < cutoff)
+                .values(status="failed", finished_at=datetime.utcnow(), active_key=None)
+            ).rowcount
+            if claimed:
+                seq = conn.execute(select(func.coalesce(func.max(_events.c.seq), 0)).where(_events.c.job_id == job_id)).scalar()
+                conn.execute(insert(_events).values(
+                    job_id=job_id, seq=seq + 1, event="error",
+                    data=json.dumps({"message": "The optimizer stopped unexpectedly. Please try again."})
+                ))
+
+
+def _prune_old_jobs(engine):
+    cutoff = datetime.utcnow() - timedelta(seconds=JOB_RETENTION_SECONDS)
+    with engine.begin() as conn:
+        old = select(_jobs.c.id).where(_jobs.c.status != "running", _jobs.c.finished_at < cutoff)
+        conn.execute(delete(_events).where(_events.c.job_id.in_(old)))
+        conn.execute(delete(_jobs).where(_jobs.c.id.in_(old)))
+
+
+def _running_job(year, month):
+    return SolverJob.query.filter_by(year=year, month=month, status="running").first()
+
+
+def start_job(app, business_id, year, month):
+    """
+    Start optimizing a month in the background, or return the run already
+    in progress for the same business and month so resubmits don't double the load.
+    Raises SolverBusyError when MAX_CONCURRENT_SOLVES runs are already going.
+    """
+    expire_stale_jobs(db.engine)
+    _prune_old_jobs(db.engine)
+
+    job = _running_job(year, month)
+    if job is not None:
+        return job
+
+    running = db.session.query(func.count(SolverJob.id)).execution_options(all_businesses=True).filter(
+        SolverJob.status == "running"
+    ).scalar()
+    if running >= MAX_CONCURRENT_SOLVES:
+        raise SolverBusyError("The optimizer is busy with other schedules. Please try again in a minute.")
+
+    job = SolverJob(year=year, month=month, status="running", active_key=f"{business_id}:{year}:{month}")
+    db.session.add(job)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # Another process started this month a moment ago
+        db.session.rollback()
+        return _running_job(year, month) or SolverJob.query.filter_by(
+            year=year, month=month
+        ).order_by(SolverJob.id.desc()).first()
+
+    _executor.submit(_run, app, job.id, business_id, year, month)
+    return job
+
+
+def get_job(job_id, business_id):
+    """The job with this id, if it belongs to business_id."""
+    return SolverJob.query.filter_by(id=job_id, business_id=business_id).first()
+
+
+def stream(engine, job_id, last_event_id=0):
+    """Yield SSE-formatted events after last_event_id until the job finishes."""
+    seq = last_event_id
+    quiet_since = time.monotonic()
+    while True:
+        with engine.connect() as conn:
+            # Status first: once it reads finished, its final event is already visible
+            status, updated_at = conn.execute(
+                select(_jobs.c.status, _jobs.c.updated_at).where(_jobs.c.id == job_id)
+            ).one()
+            rows = conn.execute(
+                select(_events.c.seq, _events.c.event, _events.c.data)
+                .where(_events.c.job_id == job_id, _events.c.seq > seq)
+                .order_by(_events.c.seq)
+            ).all()
+
+        for row in rows:
+            seq = row.seq
+            yield f"id: {row.seq}\nevent: {row.event}\ndata: {row.data}\n\n"
+        if status != "running":
+            return
+
+        now = time.monotonic()
+        if rows:
+            quiet_since = now
+        elif now - quiet_since >= KEEPALIVE_SECONDS:
+            # Comment line keeps proxies from closing an idle connection
+            yield ": keepalive\n\n"
+            quiet_since = now
+        if datetime.utcnow() - updated_at > timedelta(seconds=JOB_STALE_SECONDS):
+            expire_stale_jobs(engine)
+            continue
+        time.sleep(POLL_SECONDS)
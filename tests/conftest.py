@@ -0,0 +1,47 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# app.py reads the database URL at import time
+_db_dir = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_db_dir, 'test.db')}"
+# Tests drive the mail queue by hand instead of from its background thread
+os.environ["MAIL_ENABLED"] = "0"
+
+from app import app as flask_app  # noqa: E402
+from models import db, Business, User, business_scope  # noqa: E402
+
+
+@pytest.fixture
+def app():
+    flask_app.config["TESTING"] = True
+    with flask_app.app_context():
+        db.create_all()
+        yield flask_app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def make_business(app):
+    """make_business(name) -> business id, with a manager named '<name>-manager'."""
+    def make(name):
+        business = Business(name=name)
+        db.session.add(business)
+        db.session.commit()
+        with business_scope(business.id):
+            manager = User(username=f"{name}-manager", role="manager")
+            manager.set_password("secret")
+            db.session.add(manager)
+            db.session.commit()
+        return business.id
+    return make
+
+
+def login(client, username, password="secret"):
+    return client.post("/", data={"username": username, "password": password})
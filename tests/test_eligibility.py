@@ -0,0 +1,147 @@
+from datetime import date, time
+
+import pytest
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+
+import eligibility
+from conftest import login
+from eligibility import ShiftClaimError, assign_shift, swap_shifts
+from models import db, Shift, User, Worker, business_scope
+
+# A Monday; 2025-07-07..13 is one ISO week
+MONDAY = date(2025, 7, 7)
+
+
+@pytest.fixture
+def business(make_business):
+    business_id = make_business("a")
+    eligibility.invalidate()
+    with business_scope(business_id):
+        yield business_id
+    eligibility.invalidate()
+
+
+def _shift(day, worker=None, start=9, end=15):
+    shift = Shift(date=day, start_time=time(start), end_time=time(end), worker_id=worker.id if worker else None)
+    db.session.add(shift)
+    db.session.commit()
+    return shift
+
+
+def _workers(*names):
+    workers = [Worker(name=name) for name in names]
+    db.session.add_all(workers)
+    db.session.commit()
+    return workers
+
+
+def _commit_elsewhere(shift, worker):
+    """Assign like another process would: straight to the table, unseen by this process's index."""
+    db.session.execute(update(Shift.__table__).where(Shift.__table__.c.id == shift.id).values(worker_id=worker.id))
+    db.session.commit()
+
+
+def _holder(shift):
+    return db.session.query(Shift.worker_id).filter(Shift.id == shift.id).scalar()
+
+
+def test_claim_of_open_shift(business):
+    ann, = _workers("Ann")
+    shift = _shift(MONDAY)
+
+    assign_shift(shift, ann.id, expected_worker_id=None)
+    assert _holder(shift) == ann.id
+
+
+def test_compare_and_set_rejects_a_shift_taken_meanwhile(business):
+    ann, bob = _workers("Ann", "Bob")
+    shift = _shift(MONDAY)
+    eligibility.get_index(MONDAY)
+
+    _commit_elsewhere(shift, bob)
+    with pytest.raises(ShiftClaimError):
+        assign_shift(shift, ann.id, expected_worker_id=None)
+    assert _holder(shift) == bob.id
+
+
+def test_weekly_cap_is_checked_against_the_database(business):
+    ann, = _workers("Ann")
+    _shift(MONDAY, ann)
+    _shift(date(2025, 7, 8), ann)
+    third, fourth = _shift(date(2025, 7, 9)), _shift(date(2025, 7, 10))
+
+    # Index built at 12h; a concurrent pickup elsewhere takes Ann to 18h
+    eligibility.get_index(MONDAY)
+    _commit_elsewhere(third, ann)
+
+    with pytest.raises(ShiftClaimError, match="hours that week"):
+        assign_shift(fourth, ann.id, expected_worker_id=None)
+    assert _holder(fourth) is None
+
+
+def test_same_day_is_checked_against_the_database(business):
+    ann, = _workers("Ann")
+    morning, evening = _shift(MONDAY), _shift(MONDAY, start=16, end=20)
+
+    eligibility.get_index(MONDAY)
+    _commit_elsewhere(morning, ann)
+
+    with pytest.raises(ShiftClaimError, match="already working that day"):
+        assign_shift(evening, ann.id, expected_worker_id=None)
+    assert _holder(evening) is None
+
+
+def test_swap_is_all_or_nothing(business):
+    ann, bob, cat = _workers("Ann", "Bob", "Cat")
+    a_shift, b_shift = _shift(MONDAY, ann), _shift(date(2025, 7, 8), bob)
+
+    eligibility.get_index(MONDAY)
+    # b_shift changes hands after this request loaded it
+    _commit_elsewhere(b_shift, cat)
+    set_committed_value(b_shift, "worker_id", bob.id)
+    with pytest.raises(ShiftClaimError):
+        swap_shifts(a_shift, b_shift)
+    assert (_holder(a_shift), _holder(b_shift)) == (ann.id, cat.id)
+
+    db.session.expire_all()
+    swap_shifts(a_shift, b_shift)
+    assert (_holder(a_shift), _holder(b_shift)) == (cat.id, ann.id)
+
+
+def test_commit_during_index_load_is_not_lost(business, monkeypatch):
+    ann, = _workers("Ann")
+    cart = Shift(date=MONDAY, start_time=time(9), end_time=time(15), role_type="cart")
+    db.session.add(cart)
+    db.session.commit()
+    load = eligibility.EligibilityIndex.load
+
+    def load_then_commit_elsewhere(self, worker_ids=None):
+        load(self, worker_ids)
+        # Another request makes Ann cart staff after the index read her row
+        with Session(db.engine) as other:
+            other.get(Worker, ann.id).is_cart_staff = True
+            other.commit()
+        return self
+
+    monkeypatch.setattr(eligibility.EligibilityIndex, "load", load_then_commit_elsewhere)
+    index = eligibility.get_index(MONDAY)
+    assert index.reasons(ann.id, cart) == []
+
+
+def test_only_managers_reassign_or_swap(app, business):
+    ann, bob = _workers("Ann", "Bob")
+    a_shift, b_shift = _shift(MONDAY, ann), _shift(date(2025, 7, 8), bob)
+    employee = User(username="ann", role="employee")
+    employee.set_password("secret")
+    ann.user = employee
+    db.session.commit()
+
+    client = app.test_client()
+    login(client, "ann")
+    assert client.get(f"/shifts/{a_shift.id}/cover").status_code == 403
+    assert client.post(f"/shifts/{b_shift.id}/assign",
+                       data={"worker_id": ann.id, "expected_worker_id": bob.id}).status_code == 403
+    assert client.post(f"/shifts/{a_shift.id}/swap", data={"other_shift_id": b_shift.id}).status_code == 403
+    assert (_holder(a_shift), _holder(b_shift)) == (ann.id, bob.id)
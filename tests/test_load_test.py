@@ -0,0 +1,25 @@
+import os
+import sys
+
+from load_test import procfile_command, summarize
+
+
+def test_budgeted_route_without_query_counts_is_a_violation():
+    samples = {
+        "dashboard_employee": [(200, 0.01, None), (200, 0.02, None)],
+        "availability": [(200, 0.01, 3)],
+    }
+    report = summarize(samples, 1.0, {"dashboard_employee": 5, "availability": 5})
+    assert len(report["violations"]) == 1
+    assert report["violations"][0].startswith("dashboard_employee: 2 responses without")
+
+
+def test_over_budget_route_is_a_violation():
+    report = summarize({"availability": [(200, 0.01, 3), (200, 0.01, 7)]}, 1.0, {"availability": 5})
+    assert report["violations"] == ["availability: 7 queries (budget 5)"]
+
+
+def test_gunicorn_runs_the_procfile_web_command():
+    command = procfile_command(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    assert command[:4] == [sys.executable, "-m", "gunicorn", "app:app"]
+    assert "--worker-class" in command and "--workers" not in command
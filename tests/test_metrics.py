@@ -0,0 +1,63 @@
+import re
+from collections import Counter
+
+from conftest import login
+from load_test import _query_count
+from metrics import PROFILE_HEADER
+
+LINE = re.compile(r'^(\w+?)(?:_bucket|_sum|_count)?(\{.*\})? (\S+)$')
+DASHBOARD = 'endpoint="dashboard_manager",method="GET"'
+
+
+def _scrape(client):
+    text = client.get("/metrics").get_data(as_text=True)
+    samples = {}
+    for line in text.splitlines():
+        if not line.startswith("#"):
+            name, value = line.rsplit(" ", 1)
+            samples[name] = float(value)
+    return text, samples
+
+
+def _buckets(samples, name, labels):
+    prefix = f'{name}_bucket{{{labels},le="'
+    return [(key[len(prefix):-2], value) for key, value in samples.items() if key.startswith(prefix)]
+
+
+def test_server_timing_reports_the_query_count(app, make_business):
+    make_business("a")
+    client = app.test_client()
+    login(client, "a-manager")
+
+    response = client.get("/dashboard/manager", headers={PROFILE_HEADER: "1"})
+    timing = response.headers["Server-Timing"]
+    assert re.search(r'sql;dur=[\d.]+;desc="\d+ queries"', timing)
+    assert _query_count(timing) > 0
+    assert "Server-Timing" not in client.get("/dashboard/manager").headers
+
+
+def test_metrics_histograms_accumulate(app, make_business):
+    make_business("a")
+    client = app.test_client()
+    login(client, "a-manager")
+
+    client.get("/dashboard/manager")
+    _, before = _scrape(client)
+    client.get("/dashboard/manager")
+    client.get("/dashboard/manager")
+    text, after = _scrape(client)
+
+    count = f"grilgo_request_duration_seconds_count{{{DASHBOARD}}}"
+    assert after[count] == before[count] + 2
+
+    buckets = _buckets(after, "grilgo_request_duration_seconds", DASHBOARD)
+    values = [value for _, value in buckets]
+    assert values == sorted(values), "buckets must be cumulative"
+    assert buckets[-1] == ("+Inf", after[count])
+    assert all(after_value >= before_value for (_, after_value), (_, before_value)
+               in zip(buckets, _buckets(before, "grilgo_request_duration_seconds", DASHBOARD)))
+
+    types = Counter(line.split()[2] for line in text.splitlines() if line.startswith("# TYPE"))
+    assert types and set(types.values()) == {1}
+    names = {LINE.match(line).group(1) for line in text.splitlines() if not line.startswith("#")}
+    assert names <= set(types)
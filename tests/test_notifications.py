@@ -0,0 +1,130 @@
+from datetime import date, datetime, time
+
+import threading
+
+import pytest
+
+import notifications
+from conftest import login
+from load_test import _query_count
+from metrics import PROFILE_HEADER
+from models import db, Notification, Shift, User, Worker, business_scope
+from notifications import MailQueue, publish_schedule
+
+
+class FakeSMTP:
+    sent = []
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def send_message(self, message):
+        if message["To"] == "bounce@example.com":
+            raise ValueError("malformed message")
+        FakeSMTP.sent.append(message["To"])
+
+    def quit(self):
+        pass
+
+
+class DownSMTP:
+    def __init__(self, *args, **kwargs):
+        raise OSError("connection refused")
+
+
+@pytest.fixture
+def published(app, make_business, monkeypatch):
+    """Publish July for three workers; returns the queue with nothing sent yet."""
+    queue = MailQueue(app)
+    monkeypatch.setattr(notifications, "mail_queue", queue)
+    monkeypatch.setattr(queue, "_start", lambda: None)
+    FakeSMTP.sent = []
+
+    business = make_business("a")
+    with business_scope(business):
+        for i, email in enumerate(["ann@example.com", "bounce@example.com", "cat@example.com"]):
+            worker = Worker(name=f"W{i}", email=email)
+            db.session.add(worker)
+            db.session.flush()
+            db.session.add(Shift(date=date(2025, 7, i + 1), start_time=time(9), end_time=time(15),
+                                 worker_id=worker.id))
+        db.session.commit()
+        assert publish_schedule(2025, 7) == 3
+    return queue
+
+
+def _statuses():
+    rows = db.session.query(Worker.email, Notification.email_status, Notification.email_attempts).join(
+        Worker, Worker.id == Notification.worker_id
+    ).execution_options(all_businesses=True)
+    return {email: (status, attempts) for email, status, attempts in rows}
+
+
+def test_recovery_scan_does_not_requeue_enqueued_ids(published):
+    published._recover()
+    assert published._queue.qsize() == 3
+
+
+def test_smtp_down_backs_off_once_per_attempt(published, monkeypatch):
+    monkeypatch.setattr(notifications.smtplib, "SMTP", DownSMTP)
+    batch = published._next_batch()
+    published._send_batch(batch)
+    published._recover()
+
+    assert {attempts for _, attempts in _statuses().values()} == {1}
+    # Everything waits in the retry heap, nothing is sent again right away
+    assert published._queue.qsize() == 0
+    assert len(published._retries) == 3
+
+
+def test_bad_message_fails_alone(published, monkeypatch):
+    monkeypatch.setattr(notifications.smtplib, "SMTP", FakeSMTP)
+    published._send_batch(published._next_batch())
+
+    assert sorted(FakeSMTP.sent) == ["ann@example.com", "cat@example.com"]
+    assert _statuses() == {
+        "ann@example.com": ("sent", 1),
+        "bounce@example.com": ("failed", 1),
+        "cat@example.com": ("sent", 1),
+    }
+
+
+def test_enabled_queue_resends_pending_mail_at_startup(published, monkeypatch):
+    sent = []
+    done = threading.Event()
+
+    def send_batch(self, batch):
+        sent.extend(batch)
+        done.set()
+
+    monkeypatch.setattr(MailQueue, "_send_batch", send_batch)
+    monkeypatch.setenv("MAIL_ENABLED", "1")
+    # A new process's queue, before anything has been published in it
+    MailQueue(published.app)
+    assert done.wait(5)
+    pending = db.session.query(Notification.id).execution_options(all_businesses=True).filter(
+        Notification.email_status == "pending"
+    )
+    assert sorted(sent) == sorted(notification_id for (notification_id,) in pending)
+
+
+def test_inbox_shows_unread_then_marks_read(app, make_business):
+    business = make_business("a")
+    with business_scope(business):
+        user = User(username="ann", role="employee")
+        user.set_password("secret")
+        worker = Worker(name="Ann", user=user)
+        db.session.add(worker)
+        db.session.flush()
+        for i in range(5):
+            db.session.add(Notification(worker_id=worker.id, subject=f"Update {i}", body="",
+                                        read_at=datetime.utcnow() if i < 2 else None))
+        db.session.commit()
+
+    client = app.test_client()
+    login(client, "ann")
+    response = client.get("/inbox", headers={PROFILE_HEADER: "1"})
+    assert response.get_data(as_text=True).count("border-primary") == 3
+    # One query for the messages, not one per message
+    assert _query_count(response.headers["Server-Timing"]) <= 4
+    assert "border-primary" not in client.get("/inbox").get_data(as_text=True)
@@ -0,0 +1,68 @@
+from concurrent.futures.process import BrokenProcessPool
+from datetime import date, time
+
+import pytest
+
+import scenarios
+from conftest import login
+from models import db, Shift, Worker, business_scope
+from scenarios import solve_scenario
+
+
+def _problem():
+    workers = [
+        {"id": i, "name": "Sam", "is_cart_staff": False, "is_turn_grill_staff": False, "unavailable": set()}
+        for i in (1, 2)
+    ]
+    shifts = [
+        {"id": d, "date": date(2025, 7, d), "start_time": time(9), "end_time": time(15), "role_type": "normal"}
+        for d in (1, 2, 3)
+    ]
+    return {"workers": workers, "shifts": shifts, "max_shifts_per_day": 1}
+
+
+def test_hours_are_reported_per_worker_even_with_shared_names():
+    result = solve_scenario(_problem(), {"name": "hire", "add_workers": [{"name": "Sam"}]})
+
+    assert result["coverage"] == 1.0
+    assert set(result["hours_per_worker"]) == {1, 2, -1}
+    assert all(entry["name"] == "Sam" for entry in result["hours_per_worker"].values())
+    assert sum(entry["hours"] for entry in result["hours_per_worker"].values()) == 18
+    assert result["mean_hours"] == 6
+
+
+@pytest.fixture
+def manager(app, make_business):
+    business = make_business("a")
+    with business_scope(business):
+        worker = Worker(name="Sam")
+        db.session.add(worker)
+        db.session.flush()
+        db.session.add(Shift(date=date(2025, 7, 1), start_time=time(9), end_time=time(15)))
+        db.session.commit()
+    client = app.test_client()
+    login(client, "a-manager")
+    return client
+
+
+@pytest.mark.parametrize("time_limit", ["nan", "inf", -5, 0, "soon"])
+def test_bad_time_limit_is_rejected(manager, time_limit):
+    response = manager.post("/scenarios/2025/7", json={"time_limit": time_limit})
+    assert response.status_code == 400
+
+
+class BrokenPool:
+    def submit(self, *args, **kwargs):
+        raise BrokenProcessPool("worker died")
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        pass
+
+
+def test_broken_pool_is_replaced(manager, monkeypatch):
+    broken = BrokenPool()
+    monkeypatch.setattr(scenarios, "_pool", broken)
+
+    response = manager.post("/scenarios/2025/7", json={})
+    assert response.status_code == 503
+    assert scenarios._pool is None
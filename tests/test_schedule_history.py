@@ -0,0 +1,63 @@
+from datetime import date, time
+
+from conftest import login
+from models import db, Shift, Worker, ScheduleSnapshot, business_scope
+from schedule_history import unassign_shifts, restore_snapshot
+
+
+def test_restore_skips_shifts_of_deleted_workers(make_business):
+    business = make_business("a")
+    with business_scope(business):
+        kept, gone = Worker(name="Kept"), Worker(name="Gone")
+        db.session.add_all([kept, gone])
+        db.session.flush()
+        shifts = [Shift(date=date(2025, 7, d), start_time=time(9), end_time=time(15), worker_id=w.id)
+                  for d, w in ((1, kept), (2, gone))]
+        db.session.add_all(shifts)
+        db.session.commit()
+
+        snapshot, count = unassign_shifts(date(2025, 7, 1), date(2025, 7, 31))
+        assert count == 2
+        db.session.delete(gone)
+        db.session.commit()
+
+        undo, changed, skipped = restore_snapshot(snapshot)
+        assert (changed, skipped) == (1, 1)
+        assigned = dict(db.session.query(Shift.date, Shift.worker_id))
+        assert assigned == {date(2025, 7, 1): kept.id, date(2025, 7, 2): None}
+
+
+def test_bad_history_input_is_rejected(app, make_business):
+    make_business("a")
+    client = app.test_client()
+    login(client, "a-manager")
+
+    assert client.get("/schedule_history/2025/7?before=abc").status_code == 400
+    assert client.get("/schedule_history/2025/7?before=1&after=x").status_code == 400
+
+    response = client.post("/clear_month_schedule/2025/7", data={"start_date": "07/01/2025"})
+    assert response.status_code == 302
+
+
+def test_reset_range_stays_inside_the_month(app, make_business):
+    business = make_business("a")
+    with business_scope(business):
+        worker = Worker(name="Ann")
+        db.session.add(worker)
+        db.session.flush()
+        db.session.add_all([
+            Shift(date=d, start_time=time(9), end_time=time(15), worker_id=worker.id)
+            for d in (date(2025, 6, 30), date(2025, 7, 15), date(2025, 8, 1))
+        ])
+        db.session.commit()
+
+    client = app.test_client()
+    login(client, "a-manager")
+    client.post("/clear_month_schedule/2025/7", data={"start_date": "2025-06-01", "end_date": "2025-08-31"})
+    client.post("/clear_month_schedule/2025/7", data={"start_date": "2025-07-20", "end_date": "2025-07-10"})
+
+    with business_scope(business):
+        assigned = dict(db.session.query(Shift.date, Shift.worker_id))
+        assert assigned[date(2025, 7, 15)] is None
+        assert assigned[date(2025, 6, 30)] == assigned[date(2025, 8, 1)] == worker.id
+        assert ScheduleSnapshot.query.count() == 1
@@ -0,0 +1,118 @@
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+import solver_jobs
+from ai_scheduler import _parse_cbc_log
+from models import db, SolverJob, SolverJobEvent, business_scope
+from solver_jobs import _Publisher, SolverBusyError, start_job, stream
+
+CBC_LOG = os.path.join(os.path.dirname(__file__), "data", "cbc_minimize.log")
+
+
+def _read_log():
+    with open(CBC_LOG) as f:
+        return f.read()
+
+
+def test_parse_cbc_log_reads_latest_incumbent_bound_and_gap():
+    state = _parse_cbc_log(_read_log())
+    assert state["incumbent"] == -3870
+    assert state["bound"] == -3881.5103
+    assert state["nodes"] == 0
+    assert state["gap"] == pytest.approx(11.5103 / 3870)
+
+
+def test_parse_cbc_log_uses_relaxation_as_bound_before_branching():
+    lines = _read_log().splitlines()
+    head = "\n".join(lines[:40])
+    state = _parse_cbc_log(head)
+    assert state["incumbent"] is None
+    assert state["bound"] == -3884.71
+    assert state["gap"] is None
+
+
+def test_parse_cbc_log_treats_1e50_as_no_incumbent():
+    text = (
+        "Continuous objective value is -3884.71 - 0.00 seconds\n"
+        "Cbc0010I After 100 nodes, 12 on tree, 1e+50 best solution, best possible -3881.5 (0.50 seconds)\n"
+    )
+    state = _parse_cbc_log(text)
+    assert state["incumbent"] is None
+    assert state["bound"] == -3881.5
+    assert state["nodes"] == 100
+    assert state["gap"] is None
+
+
+def _job(business, status="running", **values):
+    with business_scope(business):
+        job = SolverJob(year=2025, month=7, status=status,
+                        active_key=f"{business}:2025:7" if status == "running" else None, **values)
+        db.session.add(job)
+        db.session.commit()
+        return job.id
+
+
+def _ids(chunks):
+    return [int(chunk.split("\n")[0][len("id: "):]) for chunk in chunks if chunk.startswith("id: ")]
+
+
+def test_stream_resumes_after_last_event_id(app, make_business):
+    job_id = _job(make_business("a"))
+    publisher = _Publisher(db.engine, job_id)
+    publisher.publish("model", {"shifts": 3})
+    publisher.publish("solve", {"incumbent": None, "gap": None})
+    publisher.finish("result", {"status": "Optimal"}, "finished")
+
+    chunks = list(stream(db.engine, job_id, last_event_id=1))
+    assert _ids(chunks) == [2, 3]
+    assert chunks[-1].startswith("id: 3\nevent: result\n")
+
+
+def test_stream_follows_a_job_written_by_another_thread(app, make_business, monkeypatch):
+    monkeypatch.setattr(solver_jobs, "POLL_SECONDS", 0.01)
+    job_id = _job(make_business("a"))
+    publisher = _Publisher(db.engine, job_id)
+    publisher.publish("model", {"shifts": 3})
+
+    def solve():
+        time.sleep(0.05)
+        publisher.publish("solve", {"incumbent": 1.0, "gap": 0.0})
+        publisher.finish("result", {"status": "Optimal"}, "finished")
+
+    writer = threading.Thread(target=solve)
+    writer.start()
+    chunks = list(stream(db.engine, job_id))
+    writer.join()
+    assert _ids(chunks) == [1, 2, 3]
+
+
+def test_stale_job_is_failed_with_an_error_event(app, make_business):
+    business = make_business("a")
+    job_id = _job(business, updated_at=datetime.utcnow() - timedelta(hours=1))
+    chunks = list(stream(db.engine, job_id))
+    assert len(chunks) == 1 and "event: error" in chunks[0]
+    with business_scope(business):
+        job = db.session.get(SolverJob, job_id, populate_existing=True)
+        assert job.status == "failed" and job.active_key is None
+
+
+def test_start_job_reuses_running_month_and_caps_concurrent_solves(app, make_business, monkeypatch):
+    submitted = []
+    monkeypatch.setattr(solver_jobs._executor, "submit", lambda *args: submitted.append(args))
+    monkeypatch.setattr(solver_jobs, "MAX_CONCURRENT_SOLVES", 2)
+    a, b, c = make_business("a"), make_business("b"), make_business("c")
+
+    with business_scope(a):
+        first = start_job(app, a, 2025, 7).id
+        assert start_job(app, a, 2025, 7).id == first
+    with business_scope(b):
+        start_job(app, b, 2025, 7)
+    with business_scope(c):
+        with pytest.raises(SolverBusyError):
+            start_job(app, c, 2025, 7)
+    assert len(submitted) == 2
+    assert db.session.query(SolverJobEvent).count() == 0
@@ -0,0 +1,72 @@
+from datetime import date, time
+
+import pytest
+
+from conftest import login
+from models import db, Shift, Worker, business_scope
+
+
+def _add_worker(business_id, name):
+    with business_scope(business_id):
+        worker = Worker(name=name)
+        db.session.add(worker)
+        db.session.commit()
+        return worker.id
+
+
+def _add_shift(business_id, worker_id=None):
+    with business_scope(business_id):
+        shift = Shift(date=date(2025, 7, 1), start_time=time(9), end_time=time(15), worker_id=worker_id)
+        db.session.add(shift)
+        db.session.commit()
+        return shift.id
+
+
+def test_queries_only_see_the_business_in_scope(make_business):
+    a, b = make_business("a"), make_business("b")
+    _add_worker(a, "Ann")
+    _add_worker(b, "Bob")
+
+    with business_scope(a):
+        assert [w.name for w in Worker.query.all()] == ["Ann"]
+    with business_scope(b):
+        assert [w.name for w in Worker.query.all()] == ["Bob"]
+
+
+def test_bulk_update_only_touches_the_business_in_scope(make_business):
+    a, b = make_business("a"), make_business("b")
+    _add_shift(a, _add_worker(a, "Ann"))
+    b_shift = _add_shift(b, _add_worker(b, "Bob"))
+
+    with business_scope(a):
+        assert Shift.query.update({Shift.worker_id: None}, synchronize_session=False) == 1
+        db.session.commit()
+
+    assert db.session.get(Shift, b_shift, execution_options={"all_businesses": True}).worker_id is not None
+
+
+def test_unscoped_query_fails_closed(app):
+    with pytest.raises(RuntimeError, match="No business in scope"):
+        Worker.query.all()
+    assert Worker.query.execution_options(all_businesses=True).all() == []
+
+
+def test_manager_cannot_touch_another_business(app, make_business):
+    make_business("a")
+    b = make_business("b")
+    b_worker = _add_worker(b, "Bob")
+
+    client = app.test_client()
+    login(client, "a-manager")
+
+    response = client.post("/toggle_cart_staff/{}".format(b_worker))
+    assert response.status_code == 404
+
+    response = client.post("/add_shift/2025-07-01", data={
+        "start_time": "09:00", "end_time": "15:00", "worker_id": b_worker,
+    })
+    assert response.status_code == 404
+    assert Shift.query.execution_options(all_businesses=True).count() == 0
+
+    with business_scope(b):
+        assert Worker.query.get(b_worker).is_cart_staff is False